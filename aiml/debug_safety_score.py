@@ -13,9 +13,12 @@ django.setup()
 
 from datetime import datetime, timedelta
 from django.utils import timezone
-from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from location_tracker.models import AnomalyAlert
-import pytz
+from zoneinfo import ZoneInfo
+
+_IST = ZoneInfo("Asia/Kolkata")
+_NIGHT_HOURS = frozenset(range(22, 24)) | frozenset(range(0, 5))  # 10 PM - 5 AM
 
 def debug_safety_score_calculation(user_id):
     """
@@ -27,33 +30,25 @@ def debug_safety_score_calculation(user_id):
     base_score = 100
     factors = []
     
-    try:
-        # Try to find user by username pattern used in TrackLocationView
-        username = f'user_{user_id}'
-        print(f"Looking for user with username: {username}")
-        
-        user = User.objects.get(username=username)
-        print(f"✅ Found user: {user} (ID: {user.id})")
-        
-        # 1. Check all anomalies for this user (regardless of time)
-        all_anomalies = AnomalyAlert.objects.filter(user=user)
-        print(f"📊 Total anomalies for this user: {all_anomalies.count()}")
-        
-        if all_anomalies.exists():
-            print("📋 All anomalies:")
-            for anomaly in all_anomalies:
-                print(f"   - {anomaly.timestamp}: Score {anomaly.anomaly_score} at ({anomaly.latitude}, {anomaly.longitude})")
-        
-        # 2. Check recent anomalies (last 24 hours)
-        one_day_ago = timezone.now() - timedelta(days=1)
-        print(f"⏰ Checking anomalies since: {one_day_ago}")
-        
-        recent_anomalies = AnomalyAlert.objects.filter(user=user, timestamp__gte=one_day_ago)
-        recent_count = recent_anomalies.count()
+    # 1. Count all anomalies and recent anomalies (last 24 hours) in one query
+    one_day_ago = timezone.now() - timedelta(days=1)
+    print(f"⏰ Checking anomalies since: {one_day_ago}")
+    
+    anomaly_counts = AnomalyAlert.objects.filter(tracking_user_id=user_id).aggregate(
+        total=Count('id'),
+        recent=Count('id', filter=Q(timestamp__gte=one_day_ago)),
+    )
+    print(f"📊 Total anomalies for this user: {anomaly_counts['total']}")
+    
+    if anomaly_counts['total']:
+        recent_count = anomaly_counts['recent']
         print(f"🚨 Recent anomalies (last 24h): {recent_count}")
         
-        if recent_anomalies.exists():
+        if recent_count:
             print("📋 Recent anomalies:")
+            recent_anomalies = AnomalyAlert.objects.filter(
+                tracking_user_id=user_id, timestamp__gte=one_day_ago
+            ).only('timestamp', 'anomaly_score')
             for anomaly in recent_anomalies:
                 print(f"   - {anomaly.timestamp}: Score {anomaly.anomaly_score}")
         
@@ -63,13 +58,12 @@ def debug_safety_score_calculation(user_id):
         if anomaly_penalty > 0:
             factors.append(f"Detected {recent_count} recent movement anomalies")
 
-        # 3. Time of Day Penalty
-        ist = pytz.timezone('Asia/Kolkata')
-        now_ist = datetime.now(ist)
+        # 2. Time of Day Penalty
+        now_ist = datetime.now(_IST)
         current_hour = now_ist.hour
         print(f"🕐 Current time in IST: {now_ist.strftime('%H:%M:%S')} (Hour: {current_hour})")
         
-        if current_hour >= 22 or current_hour < 5:
+        if current_hour in _NIGHT_HOURS:
             time_penalty = 10
             factors.append("Traveling during late night hours")
             print(f"🌙 Late night penalty: {time_penalty} points")
@@ -77,7 +71,7 @@ def debug_safety_score_calculation(user_id):
             time_penalty = 0
             print(f"☀️ Daytime travel: no penalty")
             
-        # 4. Calculate final score
+        # 3. Calculate final score
         print(f"\n🧮 Score Calculation:")
         print(f"   Base score: {base_score}")
         print(f"   Anomaly penalty: -{anomaly_penalty}")
@@ -89,8 +83,8 @@ def debug_safety_score_calculation(user_id):
         final_score = max(0, min(100, final_score))  # Clamp score between 0 and 100
         print(f"   Final (clamped): {final_score}")
         
-    except User.DoesNotExist:
-        print(f"❌ User with username 'user_{user_id}' not found")
+    else:
+        print(f"❌ No anomaly alerts recorded for tracking user '{user_id}'")
         final_score = base_score
         factors.append("No tracking history available")
 
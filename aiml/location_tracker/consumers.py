@@ -1,16 +1,103 @@
-import json
+import orjson
 import asyncio
-from datetime import datetime
+import redis
+import numpy as np
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.consumer import AsyncConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
 from asgiref.sync import sync_to_async
 
 from .models import AnomalyAlert
-from .redis_utils import redis_client
+from .redis_utils import async_redis_client, ADMIN_ALERT_CHANNEL
 from .feature_engineering import feature_engineer
 from .ml_models import anomaly_model
+from . import token_cache
+
+
+# Anomaly predictions from concurrently processed events are collected for a
+# short window and scored together with one model call
+_BATCH_WINDOW_SECONDS = 0.01
+_MAX_BATCH_SIZE = 64
+# Events a TrackLocationConsumer processes at once; enough to fill a batch
+_MAX_IN_FLIGHT_EVENTS = _MAX_BATCH_SIZE
+_prediction_queue = None
+_batch_worker_task = None
+
+
+async def _batch_worker():
+    """
+    Drain queued feature vectors, score them as one batch and resolve each
+    caller's future with its (is_anomaly, anomaly_score)
+    A failed batch fails its callers' futures and the worker moves on; if the
+    worker is cancelled, every pending caller is cancelled with it
+    """
+    while True:
+        batch = []
+        try:
+            batch.append(await _prediction_queue.get())
+            await asyncio.sleep(_BATCH_WINDOW_SECONDS)
+            while len(batch) < _MAX_BATCH_SIZE and not _prediction_queue.empty():
+                batch.append(_prediction_queue.get_nowait())
+            
+            features = np.vstack([item[0] for item in batch])
+            is_anomaly, anomaly_scores = await sync_to_async(anomaly_model.predict_anomaly_batch)(features)
+        except asyncio.CancelledError:
+            while not _prediction_queue.empty():
+                batch.append(_prediction_queue.get_nowait())
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        
+        for (_, future), anomaly, score in zip(batch, is_anomaly, anomaly_scores):
+            if not future.done():
+                future.set_result((bool(anomaly), float(score)))
+
+
+async def predict_anomaly_batched(features):
+    """
+    Queue a (1, n_features) feature vector for batched prediction
+    Returns (is_anomaly, anomaly_score)
+    """
+    global _prediction_queue, _batch_worker_task
+    
+    if _prediction_queue is None:
+        _prediction_queue = asyncio.Queue()
+    if _batch_worker_task is None or _batch_worker_task.done():
+        # Restart on the existing queue so callers already waiting in it are
+        # still served
+        _batch_worker_task = asyncio.create_task(_batch_worker())
+    
+    future = asyncio.get_running_loop().create_future()
+    await _prediction_queue.put((features, future))
+    return await future
+
+
+def _parse_timestamp(value):
+    """
+    Convert a client timestamp (ISO 8601 string, epoch seconds or datetime)
+    to a datetime; returns None for anything else
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    return None
 
 
 class TrackLocationConsumer(AsyncConsumer):
@@ -18,7 +105,27 @@ class TrackLocationConsumer(AsyncConsumer):
     Consumer for processing location tracking data and detecting anomalies
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_flight = asyncio.Semaphore(_MAX_IN_FLIGHT_EVENTS)
+        self._location_tasks = set()
+    
     async def track_location(self, event):
+        """
+        Start processing an incoming location in its own task so several
+        events are in flight (and batched) at once; waits when
+        _MAX_IN_FLIGHT_EVENTS are already being processed
+        """
+        await self._in_flight.acquire()
+        task = asyncio.create_task(self._process_location(event))
+        self._location_tasks.add(task)
+        task.add_done_callback(self._location_done)
+    
+    def _location_done(self, task):
+        self._location_tasks.discard(task)
+        self._in_flight.release()
+    
+    async def _process_location(self, event):
         """
         Handle incoming location data and perform anomaly detection
         """
@@ -26,15 +133,22 @@ class TrackLocationConsumer(AsyncConsumer):
         user_id = data['user_id']
         
         try:
+            # Parse the timestamp once; the Redis window, the alert row and the
+            # admin payload all reuse it
+            timestamp = _parse_timestamp(data['timestamp'])
+            if timestamp is None:
+                print(f"Rejected location data with invalid timestamp: {data['timestamp']!r}")
+                return
+            
             # Add location point to Redis sliding window
             location_data = {
-                'latitude': str(data['latitude']),
-                'longitude': str(data['longitude']),
-                'timestamp': data['timestamp'].isoformat() if hasattr(data['timestamp'], 'isoformat') else str(data['timestamp'])
+                'latitude': data['latitude'],
+                'longitude': data['longitude'],
+                'timestamp': timestamp
             }
             
             # Get current window after adding new point
-            window = await sync_to_async(redis_client.add_location_point)(user_id, location_data)
+            window = await async_redis_client.add_location_point(user_id, location_data)
             
             # Only process if we have enough data points
             if len(window) >= 2:
@@ -43,7 +157,7 @@ class TrackLocationConsumer(AsyncConsumer):
                 
                 if features is not None:
                     # Predict anomaly using the ML model
-                    is_anomaly, anomaly_score = await sync_to_async(anomaly_model.predict_anomaly)(features)
+                    is_anomaly, anomaly_score = await predict_anomaly_batched(features)
                     
                     if is_anomaly:
                         # Create anomaly alert in database
@@ -51,9 +165,10 @@ class TrackLocationConsumer(AsyncConsumer):
                             user_id=user_id,
                             latitude=data['latitude'],
                             longitude=data['longitude'],
-                            timestamp=data['timestamp'],
+                            timestamp=timestamp,
                             anomaly_score=float(anomaly_score)
                         )
+                        await async_redis_client.invalidate_safety_score(user_id)
                         
                         # Send alert to admin channel
                         await self.send_admin_alert({
@@ -62,7 +177,7 @@ class TrackLocationConsumer(AsyncConsumer):
                                 'user_id': user_id,
                                 'latitude': float(data['latitude']),
                                 'longitude': float(data['longitude']),
-                                'timestamp': data['timestamp'].isoformat() if hasattr(data['timestamp'], 'isoformat') else str(data['timestamp']),
+                                'timestamp': timestamp.isoformat(),
                                 'anomaly_score': float(anomaly_score),
                                 'description': 'Anomalous movement pattern detected'
                             }
@@ -77,14 +192,8 @@ class TrackLocationConsumer(AsyncConsumer):
         Create an anomaly alert in the database
         """
         try:
-            user = User.objects.get(id=user_id)
-            
-            # Convert timestamp if it's a string
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                
             alert = AnomalyAlert.objects.create(
-                user=user,
+                tracking_user_id=str(user_id),
                 latitude=latitude,
                 longitude=longitude,
                 timestamp=timestamp,
@@ -97,18 +206,10 @@ class TrackLocationConsumer(AsyncConsumer):
     
     async def send_admin_alert(self, alert_data):
         """
-        Send alert to admin WebSocket group
+        Publish alert once to the Redis admin alerts channel; Redis fans it
+        out to every subscribed AdminAlertConsumer
         """
-        from channels.layers import get_channel_layer
-        
-        channel_layer = get_channel_layer()
-        await channel_layer.group_send(
-            'admin_alerts',
-            {
-                'type': 'admin_alert',
-                'message': alert_data
-            }
-        )
+        await async_redis_client.push_admin_alert(alert_data)
 
 
 class AdminAlertConsumer(AsyncWebsocketConsumer):
@@ -122,60 +223,83 @@ class AdminAlertConsumer(AsyncWebsocketConsumer):
         Handle WebSocket connection
         """
         # Get token from query parameters
-        query_params = dict(self.scope['query_string'].decode().split('&'))
-        token = None
-        
-        for param in query_params:
-            if '=' in param:
-                key, value = param.split('=', 1)
-                if key == 'token':
-                    token = value
-                    break
+        query_params = parse_qs(self.scope['query_string'].decode())
+        token = query_params.get('token', [None])[0]
         
         if not token:
             await self.close(code=4001)
             return
             
         # Authenticate user
-        user = await self.get_user_from_token(token)
+        user = await self.get_cached_user_from_token(token)
         if not user or not (user.is_staff or user.is_superuser):
             await self.close(code=4003)
             return
         
         self.user = user
-        self.group_name = 'admin_alerts'
         
-        # Join admin alerts group
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name
-        )
+        # Subscribe to the admin alerts Pub/Sub channel
+        self._pubsub = async_redis_client.admin_alert_subscription()
+        await self._pubsub.subscribe(ADMIN_ALERT_CHANNEL)
         
         await self.accept()
         
         # Send connection success message
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=orjson.dumps({
             'type': 'connection_established',
             'message': f'Connected as {user.username}'
-        }))
+        }).decode())
+        
+        self._reader_task = asyncio.create_task(self._forward_alerts())
     
     async def disconnect(self, close_code):
         """
         Handle WebSocket disconnection
         """
-        if hasattr(self, 'group_name'):
-            await self.channel_layer.group_discard(
-                self.group_name,
-                self.channel_name
-            )
+        if hasattr(self, '_reader_task'):
+            # Let the reader stop before the pubsub connection is torn down
+            # so the two never use it at the same time
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        if hasattr(self, '_pubsub'):
+            try:
+                await self._pubsub.unsubscribe(ADMIN_ALERT_CHANNEL)
+            except redis.exceptions.RedisError:
+                # The connection is already gone; closing still releases it
+                pass
+            finally:
+                await self._pubsub.aclose()
     
-    async def admin_alert(self, event):
+    async def _forward_alerts(self):
         """
-        Send alert message to WebSocket
+        Relay published alerts to the WebSocket; payloads are already JSON
+        Closes the WebSocket if the subscription is lost, so the admin
+        client reconnects instead of silently receiving nothing
         """
-        message = event['message']
+        try:
+            async for message in self._pubsub.listen():
+                if message['type'] == 'message':
+                    await self.send(text_data=message['data'].decode())
+        except redis.exceptions.RedisError as e:
+            print(f"Admin alert subscription lost: {e}")
+            await self.close()
+    
+    async def get_cached_user_from_token(self, token):
+        """
+        Get user from authentication token, reusing lookups from the last
+        token_cache.TOKEN_CACHE_TTL_SECONDS
+        """
+        user = token_cache.get_cached_user(token)
+        if user is not None:
+            return user
         
-        await self.send(text_data=json.dumps(message))
+        user = await self.get_user_from_token(token)
+        if user is not None:
+            token_cache.cache_user(token, user)
+        return user
     
     @database_sync_to_async
     def get_user_from_token(self, token):
@@ -183,8 +307,7 @@ class AdminAlertConsumer(AsyncWebsocketConsumer):
         Get user from authentication token
         """
         try:
-            from rest_framework.authtoken.models import Token
-            token_obj = Token.objects.get(key=token)
+            token_obj = Token.objects.select_related('user').get(key=token)
             return token_obj.user
         except Token.DoesNotExist:
             return None
\ No newline at end of file
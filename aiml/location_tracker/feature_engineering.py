@@ -1,7 +1,20 @@
 import math
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
+from typing import List, Optional, Tuple
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, fall back to the NumPy implementation
+    _NUMBA_AVAILABLE = False
+
+
+# Constants for the compiled kernel; numba freezes module-level floats at
+# compile time so they fold into the generated code
+_EARTH_R = 6371000.0  # Radius of earth in meters
+_EARTH_D = 2.0 * _EARTH_R
+_DEG2RAD = math.pi / 180.0
+_RAD2DEG = 180.0 / math.pi
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -51,6 +64,95 @@ def bearing_difference(bearing1: float, bearing2: float) -> float:
     return diff
 
 
+if _NUMBA_AVAILABLE:
+    # fastmath without the no-NaN/no-Inf assumptions: NaN timestamps must still
+    # fail the time_diff > 0 check so their pairs are skipped
+    @njit(cache=True, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+    def _extract_features_numba(lat, lon, t):
+        """
+        Compiled feature pipeline over float64 lat/lon/epoch arrays
+        Returns the 14 element feature vector, or an empty array if no pair is usable
+        """
+        n = lat.shape[0]
+        speeds = np.empty(n - 1)
+        bearings = np.empty(n - 1)
+        m = 0
+        
+        # Every point is the end of one pair and the start of the next, so
+        # convert to radians and take sin/cos of the latitude once per point
+        lat_rad = lat * _DEG2RAD
+        lon_rad = lon * _DEG2RAD
+        sin_lat = np.sin(lat_rad)
+        cos_lat = np.cos(lat_rad)
+        
+        for i in range(1, n):
+            time_diff = t[i] - t[i - 1]
+            if not time_diff > 0:
+                continue
+            
+            dlat = lat_rad[i] - lat_rad[i - 1]
+            dlon = lon_rad[i] - lon_rad[i - 1]
+            
+            # Haversine distance and speed (m/s)
+            sin_dlat = math.sin(dlat * 0.5)
+            sin_dlon = math.sin(dlon * 0.5)
+            a = sin_dlat * sin_dlat + cos_lat[i - 1] * cos_lat[i] * sin_dlon * sin_dlon
+            speeds[m] = _EARTH_D * math.asin(math.sqrt(a)) / time_diff
+            
+            # Bearing normalized to 0-360
+            y = math.sin(dlon) * cos_lat[i]
+            x = cos_lat[i - 1] * sin_lat[i] - sin_lat[i - 1] * cos_lat[i] * math.cos(dlon)
+            bearings[m] = (math.atan2(y, x) * _RAD2DEG + 360.0) % 360.0
+            m += 1
+        
+        if m == 0:
+            return np.empty(0)
+        
+        features = np.zeros(14)
+        s = speeds[:m]
+        
+        # Speed statistics
+        features[0] = s.mean()
+        if m > 1:
+            features[1] = s.std()
+        features[2] = s.max()
+        features[3] = s.min()
+        
+        if m > 1:
+            bearing_changes = np.empty(m - 1)
+            accelerations = np.empty(m - 1)
+            for j in range(1, m):
+                change = abs(bearings[j] - bearings[j - 1])
+                if change > 180:
+                    change = 360 - change
+                bearing_changes[j - 1] = change
+                # Assuming roughly equal 10 second intervals
+                accelerations[j - 1] = (s[j] - s[j - 1]) / 10.0
+            
+            # Bearing change statistics
+            features[4] = bearing_changes.mean()
+            if m > 2:
+                features[5] = bearing_changes.std()
+            features[6] = bearing_changes.max()
+            
+            # Acceleration statistics
+            features[7] = accelerations.mean()
+            if m > 2:
+                features[8] = accelerations.std()
+            features[9] = accelerations.max()
+            features[10] = accelerations.min()
+            features[13] = np.abs(accelerations).sum()
+        
+        # Additional features
+        features[11] = n
+        features[12] = s[m - 1]
+        
+        return features
+    
+    # Compile up front so the first location update doesn't pay the JIT latency
+    _extract_features_numba(np.zeros(2), np.zeros(2), np.array([0.0, 1.0]))
+
+
 class LocationFeatureEngineer:
     """
     Feature engineering for location tracking data
@@ -59,7 +161,23 @@ class LocationFeatureEngineer:
     def __init__(self):
         pass
     
-    def extract_features(self, location_window: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    def _window_to_arrays(self, location_window: List[bytes]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Unpack a window of packed <ddd records (see redis_utils) into latitude,
+        longitude and epoch-second arrays
+        The window is already in chronological order (see
+        RedisClient.get_location_window), so no sort is needed here
+        """
+        records = np.frombuffer(b''.join(location_window), dtype='<f8').reshape(-1, 3)
+        
+        # Transpose the interleaved records into one contiguous (3, N) block so
+        # each field is a C-contiguous float64 array; strided read-only views
+        # would compile and dispatch a second numba specialization. float64 is
+        # kept because float32 cannot resolve epoch seconds
+        lat, lon, t = records.T.copy()
+        return lat, lon, t
+    
+    def extract_features(self, location_window: List[bytes]) -> Optional[np.ndarray]:
         """
         Extract features from a sliding window of location data
         Returns feature vector or None if insufficient data
@@ -67,89 +185,86 @@ class LocationFeatureEngineer:
         if len(location_window) < 2:
             return None
         
-        # Sort by timestamp to ensure chronological order
-        sorted_window = sorted(location_window, key=lambda x: x['timestamp'])
+        lat, lon, t = self._window_to_arrays(location_window)
         
-        features = []
-        speeds = []
-        bearings = []
+        if _NUMBA_AVAILABLE:
+            features = _extract_features_numba(lat, lon, t)
+            if features.size == 0:
+                return None
+            return features.reshape(1, -1)
         
-        # Calculate point-to-point features
-        for i in range(1, len(sorted_window)):
-            prev_point = sorted_window[i-1]
-            curr_point = sorted_window[i]
-            
-            # Parse timestamps
-            try:
-                prev_time = datetime.fromisoformat(prev_point['timestamp'].replace('Z', '+00:00'))
-                curr_time = datetime.fromisoformat(curr_point['timestamp'].replace('Z', '+00:00'))
-                time_diff = (curr_time - prev_time).total_seconds()
-                
-                if time_diff <= 0:
-                    continue
-                    
-            except (ValueError, KeyError):
-                continue
-            
-            # Calculate distance and speed
-            distance = haversine_distance(
-                float(prev_point['latitude']), float(prev_point['longitude']),
-                float(curr_point['latitude']), float(curr_point['longitude'])
-            )
-            
-            speed = distance / time_diff if time_diff > 0 else 0  # m/s
-            speeds.append(speed)
-            
-            # Calculate bearing
-            bearing = calculate_bearing(
-                float(prev_point['latitude']), float(prev_point['longitude']),
-                float(curr_point['latitude']), float(curr_point['longitude'])
-            )
-            bearings.append(bearing)
-        
-        if not speeds:
+        return self._extract_features_numpy(lat, lon, t)
+    
+    def _extract_features_numpy(self, lat: np.ndarray, lon: np.ndarray, t: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Vectorized NumPy feature extraction, used when numba is not installed
+        """
+        # Convert to radians and take sin/cos of the latitude once per point,
+        # then pair points up with [:-1]/[1:] slices
+        lat_rad = np.deg2rad(lat)
+        lon_rad = np.deg2rad(lon)
+        sin_lat = np.sin(lat_rad)
+        cos_lat = np.cos(lat_rad)
+        
+        # Keep only consecutive pairs moving forward in time (NaN compares False)
+        time_diffs = np.diff(t)
+        valid = time_diffs > 0
+        if not valid.any():
             return None
         
-        # Calculate bearing changes
-        bearing_changes = []
-        for i in range(1, len(bearings)):
-            bearing_change = bearing_difference(bearings[i-1], bearings[i])
-            bearing_changes.append(bearing_change)
+        sin_lat1 = sin_lat[:-1][valid]
+        sin_lat2 = sin_lat[1:][valid]
+        cos_lat1 = cos_lat[:-1][valid]
+        cos_lat2 = cos_lat[1:][valid]
+        dlat = np.diff(lat_rad)[valid]
+        dlon = np.diff(lon_rad)[valid]
+        
+        # Haversine distance and speed (m/s) for every pair at once
+        a = np.sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin(dlon / 2) ** 2
+        distances = _EARTH_D * np.arcsin(np.sqrt(a))
+        speeds = distances / time_diffs[valid]
+        
+        # Bearings normalized to 0-360
+        y = np.sin(dlon) * cos_lat2
+        x = cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * np.cos(dlon)
+        bearings = (np.degrees(np.arctan2(y, x)) + 360) % 360
+        
+        # Bearing changes folded to 0-180
+        bearing_changes = np.abs(np.diff(bearings))
+        bearing_changes = np.minimum(bearing_changes, 360 - bearing_changes)
         
-        # Calculate accelerations
-        accelerations = []
-        for i in range(1, len(speeds)):
-            # Estimate time difference (assuming roughly equal intervals)
-            time_diff = 10.0  # seconds (approximate)
-            acceleration = (speeds[i] - speeds[i-1]) / time_diff
-            accelerations.append(acceleration)
+        # Accelerations, assuming roughly equal 10 second intervals
+        accelerations = np.diff(speeds) / 10.0
+        
+        has_bearing_changes = bearing_changes.size > 0
+        has_accelerations = accelerations.size > 0
         
         # Aggregate features
-        features.extend([
+        features = [
             # Speed statistics
-            np.mean(speeds) if speeds else 0,
-            np.std(speeds) if len(speeds) > 1 else 0,
-            np.max(speeds) if speeds else 0,
-            np.min(speeds) if speeds else 0,
+            speeds.mean(),
+            speeds.std() if speeds.size > 1 else 0,
+            speeds.max(),
+            speeds.min(),
             
             # Bearing change statistics
-            np.mean(bearing_changes) if bearing_changes else 0,
-            np.std(bearing_changes) if len(bearing_changes) > 1 else 0,
-            np.max(bearing_changes) if bearing_changes else 0,
+            bearing_changes.mean() if has_bearing_changes else 0,
+            bearing_changes.std() if bearing_changes.size > 1 else 0,
+            bearing_changes.max() if has_bearing_changes else 0,
             
             # Acceleration statistics
-            np.mean(accelerations) if accelerations else 0,
-            np.std(accelerations) if len(accelerations) > 1 else 0,
-            np.max(accelerations) if accelerations else 0,
-            np.min(accelerations) if accelerations else 0,
+            accelerations.mean() if has_accelerations else 0,
+            accelerations.std() if accelerations.size > 1 else 0,
+            accelerations.max() if has_accelerations else 0,
+            accelerations.min() if has_accelerations else 0,
             
             # Additional features
-            len(sorted_window),  # Number of points in window
-            speeds[-1] if speeds else 0,  # Current speed
-            np.sum([abs(acc) for acc in accelerations]) if accelerations else 0,  # Total acceleration magnitude
-        ])
+            lat.size,  # Number of points in window
+            speeds[-1],  # Current speed
+            np.abs(accelerations).sum(),  # Total acceleration magnitude
+        ]
         
-        return np.array(features).reshape(1, -1)
+        return np.array(features, dtype=np.float64).reshape(1, -1)
     
     def is_anomalous_behavior(self, features: np.ndarray, threshold: float = -0.1) -> Tuple[bool, float]:
         """
@@ -162,28 +277,17 @@ class LocationFeatureEngineer:
         # Simple rule-based anomaly detection as fallback
         # This can be replaced with the trained Isolation Forest model
         
-        speed_mean = features[0, 0]
-        speed_max = features[0, 2]
-        bearing_change_max = features[0, 6]
-        acceleration_max = features[0, 9]
-        
-        anomaly_indicators = 0
-        
-        # High speed anomaly (> 50 m/s ≈ 180 km/h)
-        if speed_max > 50:
-            anomaly_indicators += 1
-        
-        # Sudden direction change (> 120 degrees)
-        if bearing_change_max > 120:
-            anomaly_indicators += 1
-        
-        # High acceleration/deceleration (> 10 m/s²)
-        if abs(acceleration_max) > 10:
-            anomaly_indicators += 1
+        # Pull the four features out as Python floats in one call and count
+        # the indicators as a sum of booleans instead of a chain of ifs
+        (speed_mean, _, speed_max, _, _, _,
+         bearing_change_max, _, _, acceleration_max) = features[0, :10].tolist()
         
-        # Very low speed but high bearing changes (erratic movement)
-        if speed_mean < 1 and bearing_change_max > 90:
-            anomaly_indicators += 1
+        anomaly_indicators = (
+            (speed_max > 50)                                    # High speed (> 50 m/s ≈ 180 km/h)
+            + (bearing_change_max > 120)                        # Sudden direction change (> 120 degrees)
+            + (abs(acceleration_max) > 10)                      # High acceleration/deceleration (> 10 m/s²)
+            + ((speed_mean < 1) & (bearing_change_max > 90))    # Very low speed but erratic heading
+        )
         
         is_anomaly = anomaly_indicators >= 2
         confidence = anomaly_indicators / 4.0
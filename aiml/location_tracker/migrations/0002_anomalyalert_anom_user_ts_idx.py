@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-14 17:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location_tracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Replaces the ascending (user, timestamp) index rather than adding a
+        # second index over the same columns
+        migrations.RemoveIndex(
+            model_name='anomalyalert',
+            name='location_tr_user_id_ae8d96_idx',
+        ),
+        migrations.AddIndex(
+            model_name='anomalyalert',
+            index=models.Index(fields=['user', '-timestamp'], name='anom_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-14 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location_tracker', '0002_anomalyalert_anom_user_ts_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='anomalyalert',
+            name='latitude',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='anomalyalert',
+            name='longitude',
+            field=models.FloatField(),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location_tracker', '0003_alter_anomalyalert_latitude_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # is_resolved alone is a prefix of the new index, so its own index
+        # only adds write overhead
+        migrations.RemoveIndex(
+            model_name='anomalyalert',
+            name='location_tr_is_reso_adae01_idx',
+        ),
+        migrations.AddIndex(
+            model_name='anomalyalert',
+            index=models.Index(fields=['is_resolved', '-timestamp'], name='anom_unresolved_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Substr
+
+
+def backfill_tracking_user_id(apps, schema_editor):
+    # Existing alerts point at the lazily created 'user_<user_id>' accounts;
+    # copy the <user_id> part into tracking_user_id in one UPDATE
+    AnomalyAlert = apps.get_model('location_tracker', 'AnomalyAlert')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    tracking_ids = User.objects.filter(
+        pk=OuterRef('user_id'), username__startswith='user_'
+    ).values(tracking_id=Substr('username', len('user_') + 1))
+    AnomalyAlert.objects.filter(tracking_user_id__isnull=True).update(
+        tracking_user_id=Subquery(tracking_ids)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location_tracker', '0004_anomalyalert_anom_unresolved_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anomalyalert',
+            name='tracking_user_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='anomalyalert',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_tracking_user_id, migrations.RunPython.noop),
+    ]
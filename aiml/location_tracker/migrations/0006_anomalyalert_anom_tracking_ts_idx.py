@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location_tracker', '0005_anomalyalert_tracking_user_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='anomalyalert',
+            name='tracking_user_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='anomalyalert',
+            index=models.Index(fields=['tracking_user_id', '-timestamp'], name='anom_tracking_ts_idx'),
+        ),
+    ]
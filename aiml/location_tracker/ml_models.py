@@ -15,6 +15,8 @@ class AnomalyDetectionModel:
     def __init__(self):
         self.model = None
         self.scaler = None
+        self._scaler_mean = None
+        self._scaler_inv_scale = None
         self.model_path = os.path.join(settings.BASE_DIR, 'location_tracker', 'models', 'isolation_forest.joblib')
         self.scaler_path = os.path.join(settings.BASE_DIR, 'location_tracker', 'models', 'scaler.joblib')
         self._ensure_model_directory()
@@ -75,7 +77,7 @@ class AnomalyDetectionModel:
             
             data.append(sample)
         
-        return np.array(data)
+        return np.array(data, dtype=np.float32)
     
     def train_model(self, contamination: float = 0.1):
         """
@@ -88,7 +90,7 @@ class AnomalyDetectionModel:
         
         # Initialize and fit scaler
         self.scaler = StandardScaler()
-        scaled_data = self.scaler.fit_transform(training_data)
+        scaled_data = self.scaler.fit_transform(training_data).astype(np.float32, copy=False)
         
         # Initialize and train Isolation Forest
         self.model = IsolationForest(
@@ -98,6 +100,7 @@ class AnomalyDetectionModel:
         )
         
         self.model.fit(scaled_data)
+        self._cache_scaler_params()
         
         # Save model and scaler
         self.save_model()
@@ -114,6 +117,7 @@ class AnomalyDetectionModel:
             if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
                 self.model = joblib.load(self.model_path)
                 self.scaler = joblib.load(self.scaler_path)
+                self._cache_scaler_params()
                 print("Model and scaler loaded successfully")
                 return True
             else:
@@ -124,12 +128,31 @@ class AnomalyDetectionModel:
             print(f"Error loading model: {e}")
             return False
     
+    def _cache_scaler_params(self):
+        """
+        Cache the scaler's mean and inverse scale so single-row predictions can
+        be standardized with plain array math instead of scaler.transform
+        """
+        self._scaler_mean = self.scaler.mean_.astype(np.float32)
+        self._scaler_inv_scale = (1.0 / self.scaler.scale_).astype(np.float32)
+    
     def save_model(self):
         """Save the trained model and scaler to disk"""
         if self.model is not None and self.scaler is not None:
             joblib.dump(self.model, self.model_path)
             joblib.dump(self.scaler, self.scaler_path)
     
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        """
+        Standardize feature rows (equivalent to self.scaler.transform without
+        the input validation and copies)
+        Output is float32, the dtype IsolationForest's trees work in, so
+        sklearn doesn't convert it again
+        """
+        scaled_features = np.subtract(features, self._scaler_mean, dtype=np.float32)
+        scaled_features *= self._scaler_inv_scale
+        return scaled_features
+    
     def predict_anomaly(self, features: np.ndarray) -> Tuple[bool, float]:
         """
         Predict if the given features represent anomalous behavior
@@ -142,7 +165,7 @@ class AnomalyDetectionModel:
         
         try:
             # Scale features
-            scaled_features = self.scaler.transform(features)
+            scaled_features = self._scale(features)
             
             # Get prediction and anomaly score
             prediction = self.model.predict(scaled_features)[0]  # -1 for anomaly, 1 for normal
@@ -155,6 +178,29 @@ class AnomalyDetectionModel:
         except Exception as e:
             print(f"Error in anomaly prediction: {e}")
             return False, 0.0
+    
+    def predict_anomaly_batch(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict anomalies for a (n_samples, n_features) batch with one model call
+        Returns (is_anomaly, anomaly_scores) arrays with one entry per row
+        """
+        n_samples = features.shape[0]
+        
+        if self.model is None or self.scaler is None:
+            if not self.load_model():
+                return np.zeros(n_samples, dtype=bool), np.zeros(n_samples)
+        
+        try:
+            scaled_features = self._scale(features)
+            
+            predictions = self.model.predict(scaled_features)  # -1 for anomaly, 1 for normal
+            anomaly_scores = self.model.decision_function(scaled_features)
+            
+            return predictions == -1, anomaly_scores
+            
+        except Exception as e:
+            print(f"Error in batch anomaly prediction: {e}")
+            return np.zeros(n_samples, dtype=bool), np.zeros(n_samples)
 
 
 # Global model instance
@@ -3,9 +3,13 @@ from django.contrib.auth.models import User
 
 
 class AnomalyAlert(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
-    latitude = models.DecimalField(max_digits=9, decimal_places=6)
-    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    # Alerts from the tracking pipeline are keyed by tracking_user_id, the
+    # user_id clients send to the journey/tracking endpoints. user is only
+    # set on legacy rows
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True, null=True, blank=True)
+    tracking_user_id = models.CharField(max_length=64, null=True, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
     timestamp = models.DateTimeField(db_index=True)
     anomaly_score = models.FloatField()
     is_resolved = models.BooleanField(default=False)
@@ -14,9 +18,17 @@ class AnomalyAlert(models.Model):
     class Meta:
         ordering = ['-timestamp']
         indexes = [
-            models.Index(fields=['user', 'timestamp']),
-            models.Index(fields=['is_resolved']),
+            # Btrees scan both ways, so this also serves ascending
+            # (user, timestamp) lookups
+            models.Index(fields=['user', '-timestamp'], name='anom_user_ts_idx'),
+            # Also serves plain tracking_user_id lookups, so the column has no
+            # index of its own
+            models.Index(fields=['tracking_user_id', '-timestamp'], name='anom_tracking_ts_idx'),
+            # Also serves plain is_resolved filters, so there is no separate
+            # is_resolved index
+            models.Index(fields=['is_resolved', '-timestamp'], name='anom_unresolved_idx'),
         ]
     
     def __str__(self):
-        return f"Alert for {self.user.username} at {self.timestamp}"
+        owner = self.user.username if self.user_id else self.tracking_user_id
+        return f"Alert for {owner} at {self.timestamp}"
@@ -1,31 +1,124 @@
+import asyncio
 import redis
-import json
+import redis.asyncio
+import orjson
+import struct
+import threading
+from datetime import datetime
 from django.conf import settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Union
+
+
+# Number of points kept in each user's sliding window
+WINDOW_SIZE = 30
+
+# Connection pool settings shared by the sync and async clients. The pools
+# block for a free connection instead of opening unbounded new ones under
+# load; redis-py already sets TCP_NODELAY on every TCP connection
+REDIS_MAX_CONNECTIONS = 64
+REDIS_HEALTH_CHECK_INTERVAL = 30
+
+# Redis Pub/Sub channel admin alerts are published on
+ADMIN_ALERT_CHANNEL = "admin_alerts"
+
+# How long a computed safety score is served from Redis before recomputing
+SAFETY_SCORE_TTL_SECONDS = 45
+
+# List of anomaly alerts waiting to be bulk-inserted by flush_anomaly_buffer
+PENDING_ALERTS_KEY = "pending_alerts"
+
+# Buffered alerts that could not be inserted and were given up on, kept for
+# manual inspection instead of being retried forever
+DEAD_ALERTS_KEY = "pending_alerts:dead"
+
+# Binary layout of one window point: little-endian float64 latitude,
+# longitude and epoch seconds (24 bytes)
+_PACK = struct.Struct('<ddd')
+
+# Adds a point to the window, trims it to the newest ARGV[3] points and
+# returns the window, or nil while fewer than two points are available
+_ADD_LOCATION_LUA = """
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[3]) - 1)
+if redis.call('ZCARD', KEYS[1]) < 2 then
+    return nil
+end
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# Same as _ADD_LOCATION_LUA, but first checks that the journey key KEYS[1]
+# exists. Returns {0} without touching the window KEYS[2] when there is no
+# active journey, otherwise {1, window} with an empty window while fewer
+# than two points are available
+_TRACK_POINT_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0}
+end
+redis.call('ZADD', KEYS[2], ARGV[1], ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -tonumber(ARGV[3]) - 1)
+if redis.call('ZCARD', KEYS[2]) < 2 then
+    return {1, {}}
+end
+return {1, redis.call('ZRANGE', KEYS[2], 0, -1)}
+"""
+
+
+def _connection_kwargs() -> Dict[str, Any]:
+    """Connection settings shared by every Redis pool in this module"""
+    return {
+        'host': settings.REDIS_HOST,
+        'port': settings.REDIS_PORT,
+        'db': settings.REDIS_DB,
+        'socket_keepalive': True,
+        'health_check_interval': REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+def safety_cache_key(user_id) -> str:
+    """Redis key holding the cached safety score for a tracking user_id"""
+    return f"safety:{user_id}"
+
+
+def _timestamp_to_epoch(timestamp: Union[datetime, str, float]) -> float:
+    """
+    Convert a timestamp into epoch seconds for use as a ZSET score
+    Accepts a datetime, an ISO 8601 string or epoch seconds, so each point is
+    parsed exactly once here at ingest
+    """
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+    return float(timestamp)
+
+
+def _pack_location_point(location_data: Dict[str, Any]) -> Tuple[float, bytes]:
+    """Return the (score, member) pair stored in the window ZSET for a location point"""
+    score = _timestamp_to_epoch(location_data['timestamp'])
+    point = _PACK.pack(float(location_data['latitude']), float(location_data['longitude']), score)
+    return score, point
 
 
 class RedisClient:
     def __init__(self):
-        self.client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            decode_responses=True
-        )
+        pool = redis.BlockingConnectionPool(max_connections=REDIS_MAX_CONNECTIONS, **_connection_kwargs())
+        self.client = redis.Redis(connection_pool=pool)
+        self._add_location_script = self.client.register_script(_ADD_LOCATION_LUA)
+        self._track_point_script = self.client.register_script(_TRACK_POINT_LUA)
     
     def start_journey(self, user_id: int) -> bool:
         """Initialize a user's journey session in Redis"""
         key = f"journey:{user_id}"
         location_key = f"location:{user_id}"
         
-        # Set journey session
-        self.client.set(key, json.dumps({
+        # Set journey session and clear any existing location history in one round-trip
+        pipe = self.client.pipeline()
+        pipe.set(key, orjson.dumps({
             'status': 'active',
-            'start_time': str(json.dumps(None)),  # Will be set on first location
+            'start_time': orjson.dumps(None).decode(),  # Will be set on first location
         }))
-        
-        # Clear any existing location history
-        self.client.delete(location_key)
+        pipe.delete(location_key)
+        pipe.execute()
         
         return True
     
@@ -35,30 +128,48 @@ class RedisClient:
         location_key = f"location:{user_id}"
         
         # Remove session data
-        self.client.delete(journey_key)
-        self.client.delete(location_key)
+        self.client.delete(journey_key, location_key)
         
         return True
     
-    def add_location_point(self, user_id: int, location_data: Dict[str, Any]) -> List[Dict]:
-        """Add a location point to the sliding window and return current window"""
+    def add_location_point(self, user_id: int, location_data: Dict[str, Any]) -> List[bytes]:
+        """
+        Add a location point to the sliding window and return current window
+        The window is a list of packed <ddd (latitude, longitude, epoch) records
+        in chronological order, empty until at least two points have been collected
+        """
         location_key = f"location:{user_id}"
         
-        # Add new point to the right of the list
-        self.client.rpush(location_key, json.dumps(location_data))
-        
-        # Trim to maintain sliding window of 30 points
-        self.client.ltrim(location_key, -30, -1)
+        # The window is a sorted set scored by epoch seconds. Adding the point,
+        # evicting all but the newest WINDOW_SIZE points and reading the window
+        # back runs server-side as one atomic script call
+        score, point = _pack_location_point(location_data)
+        window_data = self._add_location_script(keys=[location_key], args=[score, point, WINDOW_SIZE])
+        return window_data or []
+    
+    def track_point_atomic(self, user_id: int, location_data: Dict[str, Any]) -> Tuple[bool, List[bytes]]:
+        """
+        Check the journey is active and add a location point in one round-trip
+        Returns (active, window); the point is only stored when the journey is
+        active, and the window follows the add_location_point contract
+        """
+        journey_key = f"journey:{user_id}"
+        location_key = f"location:{user_id}"
         
-        # Get current window
-        window_data = self.client.lrange(location_key, 0, -1)
-        return [json.loads(point) for point in window_data]
+        score, point = _pack_location_point(location_data)
+        result = self._track_point_script(keys=[journey_key, location_key], args=[score, point, WINDOW_SIZE])
+        if not result[0]:
+            return False, []
+        return True, result[1]
     
-    def get_location_window(self, user_id: int) -> List[Dict]:
-        """Get current location window for user"""
+    def get_location_window(self, user_id: int) -> List[bytes]:
+        """
+        Get current location window for user as packed <ddd records
+        The ZSET is scored by epoch seconds, so ZRANGE returns the points
+        oldest first and callers can rely on chronological order
+        """
         location_key = f"location:{user_id}"
-        window_data = self.client.lrange(location_key, 0, -1)
-        return [json.loads(point) for point in window_data]
+        return self.client.zrange(location_key, 0, -1)
     
     def is_journey_active(self, user_id: int) -> bool:
         """Check if user has an active journey"""
@@ -67,10 +178,193 @@ class RedisClient:
     
     def push_admin_alert(self, alert_data: Dict[str, Any]) -> bool:
         """Push alert to admin channel in Redis"""
-        admin_channel = "admin_alerts"
-        self.client.publish(admin_channel, json.dumps(alert_data))
+        self.client.publish(ADMIN_ALERT_CHANNEL, orjson.dumps(alert_data, option=orjson.OPT_SERIALIZE_NUMPY))
+        return True
+    
+    def buffer_anomaly_alert(self, alert_data: Dict[str, Any]) -> bool:
+        """Queue an anomaly alert for the next bulk insert"""
+        self.client.rpush(PENDING_ALERTS_KEY, orjson.dumps(alert_data))
+        return True
+    
+    def pop_pending_alerts(self, max_count: int) -> List[bytes]:
+        """Atomically take up to max_count of the oldest buffered alerts"""
+        pipe = self.client.pipeline()
+        pipe.lrange(PENDING_ALERTS_KEY, 0, max_count - 1)
+        pipe.ltrim(PENDING_ALERTS_KEY, max_count, -1)
+        alerts, _ = pipe.execute()
+        return alerts
+    
+    def requeue_pending_alerts(self, alerts: List[bytes]) -> bool:
+        """Put alerts taken by pop_pending_alerts back at the head of the buffer"""
+        if alerts:
+            self.client.lpush(PENDING_ALERTS_KEY, *reversed(alerts))
+        return True
+    
+    def dead_letter_alerts(self, alerts: List[bytes]) -> bool:
+        """Move buffered alerts that cannot be inserted to the dead-letter list"""
+        if alerts:
+            self.client.rpush(DEAD_ALERTS_KEY, *alerts)
+        return True
+    
+    def get_cached_safety_score(self, user_id) -> Optional[Dict[str, Any]]:
+        """Return the cached safety score for a user, or None on a miss or if Redis is unavailable"""
+        try:
+            cached = self.client.get(safety_cache_key(user_id))
+        except redis.RedisError:
+            return None
+        return orjson.loads(cached) if cached is not None else None
+    
+    def cache_safety_score(self, user_id, score_data: Dict[str, Any]) -> bool:
+        """Cache a computed safety score for SAFETY_SCORE_TTL_SECONDS"""
+        try:
+            self.client.setex(safety_cache_key(user_id), SAFETY_SCORE_TTL_SECONDS, orjson.dumps(score_data))
+        except redis.RedisError:
+            return False
+        return True
+    
+    def invalidate_safety_score(self, user_id) -> bool:
+        """Drop a user's cached safety score after their anomalies change"""
+        try:
+            self.client.delete(safety_cache_key(user_id))
+        except redis.RedisError:
+            return False
+        return True
+
+
+class _LoopClients(NamedTuple):
+    """Redis clients and scripts bound to one event loop"""
+    client: redis.asyncio.Redis
+    pubsub_client: redis.asyncio.Redis
+    add_location_script: Any
+    track_point_script: Any
+
+
+class AsyncRedisClient:
+    """
+    asyncio counterpart of RedisClient for use inside Channels consumers and
+    async views, so Redis calls stay on the event loop instead of hopping to
+    a thread pool
+    
+    asyncio connections belong to the loop that opened them, and outside
+    ASGI (runserver, WSGI, the test client) every async view call runs on a
+    fresh loop. Clients are therefore created lazily for the running loop.
+    A thread runs one loop at a time, so each thread keeps only the clients
+    of its current loop and replaces them when a new loop shows up; the old
+    loop and its connections are then garbage collected.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def _clients(self) -> _LoopClients:
+        loop = asyncio.get_running_loop()
+        clients = getattr(self._local, 'clients', None)
+        if clients is None or self._local.loop is not loop:
+            pool = redis.asyncio.BlockingConnectionPool(max_connections=REDIS_MAX_CONNECTIONS, **_connection_kwargs())
+            client = redis.asyncio.Redis(connection_pool=pool)
+            # Each Pub/Sub subscription pins a connection for as long as the admin
+            # socket is open, so subscriptions get their own client and cannot
+            # starve the bounded command pool. Subscribers sit in a blocking read,
+            # so TCP keepalive detects dead peers instead of periodic PINGs
+            pubsub_kwargs = _connection_kwargs()
+            pubsub_kwargs['health_check_interval'] = 0
+            clients = _LoopClients(
+                client=client,
+                pubsub_client=redis.asyncio.Redis(**pubsub_kwargs),
+                add_location_script=client.register_script(_ADD_LOCATION_LUA),
+                track_point_script=client.register_script(_TRACK_POINT_LUA),
+            )
+            self._local.loop = loop
+            self._local.clients = clients
+        return clients
+    
+    @property
+    def client(self) -> redis.asyncio.Redis:
+        """Command client for the running event loop"""
+        return self._clients().client
+    
+    async def start_journey(self, user_id: int) -> bool:
+        """Initialize a user's journey session in Redis"""
+        key = f"journey:{user_id}"
+        location_key = f"location:{user_id}"
+        
+        pipe = self.client.pipeline()
+        pipe.set(key, orjson.dumps({
+            'status': 'active',
+            'start_time': orjson.dumps(None).decode(),  # Will be set on first location
+        }))
+        pipe.delete(location_key)
+        await pipe.execute()
+        
+        return True
+    
+    async def end_journey(self, user_id: int) -> bool:
+        """Remove user's journey session from Redis"""
+        journey_key = f"journey:{user_id}"
+        location_key = f"location:{user_id}"
+        
+        await self.client.delete(journey_key, location_key)
+        
+        return True
+    
+    async def add_location_point(self, user_id: int, location_data: Dict[str, Any]) -> List[bytes]:
+        """
+        Add a location point to the sliding window and return current window
+        Same contract as RedisClient.add_location_point
+        """
+        location_key = f"location:{user_id}"
+        
+        score, point = _pack_location_point(location_data)
+        window_data = await self._clients().add_location_script(keys=[location_key], args=[score, point, WINDOW_SIZE])
+        return window_data or []
+    
+    async def track_point_atomic(self, user_id: int, location_data: Dict[str, Any]) -> Tuple[bool, List[bytes]]:
+        """
+        Check the journey is active and add a location point in one round-trip
+        Same contract as RedisClient.track_point_atomic
+        """
+        journey_key = f"journey:{user_id}"
+        location_key = f"location:{user_id}"
+        
+        score, point = _pack_location_point(location_data)
+        result = await self._clients().track_point_script(keys=[journey_key, location_key], args=[score, point, WINDOW_SIZE])
+        if not result[0]:
+            return False, []
+        return True, result[1]
+    
+    async def get_location_window(self, user_id: int) -> List[bytes]:
+        """Get current location window for user as packed <ddd records"""
+        location_key = f"location:{user_id}"
+        return await self.client.zrange(location_key, 0, -1)
+    
+    async def is_journey_active(self, user_id: int) -> bool:
+        """Check if user has an active journey"""
+        journey_key = f"journey:{user_id}"
+        return await self.client.exists(journey_key)
+    
+    async def push_admin_alert(self, alert_data: Dict[str, Any]) -> bool:
+        """Push alert to admin channel in Redis"""
+        await self.client.publish(ADMIN_ALERT_CHANNEL, orjson.dumps(alert_data, option=orjson.OPT_SERIALIZE_NUMPY))
         return True
+    
+    async def buffer_anomaly_alert(self, alert_data: Dict[str, Any]) -> bool:
+        """Queue an anomaly alert for the next bulk insert"""
+        await self.client.rpush(PENDING_ALERTS_KEY, orjson.dumps(alert_data))
+        return True
+    
+    async def invalidate_safety_score(self, user_id) -> bool:
+        """Drop a user's cached safety score after their anomalies change"""
+        try:
+            await self.client.delete(safety_cache_key(user_id))
+        except redis.RedisError:
+            return False
+        return True
+    
+    def admin_alert_subscription(self) -> redis.asyncio.client.PubSub:
+        """Create a Pub/Sub object for subscribing to admin alerts"""
+        return self._clients().pubsub_client.pubsub()
 
 
-# Global Redis client instance
-redis_client = RedisClient()
\ No newline at end of file
+# Global Redis client instances
+redis_client = RedisClient()
+async_redis_client = AsyncRedisClient()
\ No newline at end of file
@@ -11,11 +11,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('username', 'password', 'email', 'first_name', 'last_name')
     
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # create_user hashes the password itself
+        return User.objects.create_user(**validated_data)
 
 
 class LoginSerializer(serializers.Serializer):
@@ -33,8 +30,8 @@ class EndJourneySerializer(serializers.Serializer):
 
 class TrackLocationSerializer(serializers.Serializer):
     user_id = serializers.CharField(max_length=50)
-    latitude = serializers.DecimalField(max_digits=12, decimal_places=8)
-    longitude = serializers.DecimalField(max_digits=12, decimal_places=8)
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
     timestamp = serializers.DateTimeField()
     accuracy = serializers.FloatField(required=False, allow_null=True)
     speed = serializers.FloatField(required=False, allow_null=True)
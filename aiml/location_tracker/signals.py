@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import token_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_auth_token(sender, instance=None, created=False, **kwargs):
+    """Issue a DRF auth token for every newly created user"""
+    if created:
+        Token.objects.create(user=instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance=None, created=False, **kwargs):
+    """Drop cached admin logins when a user changes, e.g. loses staff status"""
+    if not created:
+        token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance=None, **kwargs):
+    """Stop a revoked token from authenticating from the cache"""
+    token_cache.invalidate_token(instance.key)
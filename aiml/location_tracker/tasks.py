@@ -0,0 +1,132 @@
+import logging
+import os
+import orjson
+import requests
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from celery import shared_task
+from .models import AnomalyAlert
+from .redis_utils import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# One pooled session per worker process, so repeated webhooks to the Express
+# server reuse keep-alive connections instead of reconnecting for every alert.
+# urllib3 retries connection failures and 5xx responses here, POST included
+# since the Express server treats a repeated alert as a new notification
+# anyway; once those are exhausted the task-level retry below takes over
+_webhook_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({'POST'}),
+    ),
+)
+_webhook_session = requests.Session()
+_webhook_session.mount('http://', _webhook_adapter)
+_webhook_session.mount('https://', _webhook_adapter)
+
+# Maximum number of buffered alerts written per INSERT
+ANOMALY_FLUSH_BATCH_SIZE = 500
+
+# Failed inserts a buffered alert survives before it is moved to the
+# dead-letter list instead of being requeued again
+ANOMALY_FLUSH_MAX_ATTEMPTS = 5
+
+
+@shared_task(
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def send_anomaly_webhook(webhook_data):
+    """
+    Send an anomaly alert to the Express server
+    Runs on a Celery worker so the tracking request does not wait on the
+    webhook; network errors, timeouts and 5xx responses are retried with
+    backoff
+    """
+    user_id = webhook_data.get('user_id')
+    express_webhook_url = os.getenv('EXPRESS_WEBHOOK_URL', 'http://localhost:8080/api/v1/alerts/anomaly')
+    
+    response = _webhook_session.post(
+        express_webhook_url,
+        json=webhook_data,
+        timeout=5
+    )
+    
+    if response.status_code == 200:
+        logger.info("Anomaly webhook sent successfully for user %s", user_id)
+    else:
+        logger.warning("Webhook failed with status %s: %s", response.status_code, response.text)
+
+
+def _parse_buffered_alert(item):
+    """
+    Decode one buffered alert into (record, AnomalyAlert)
+    Returns None for records that can never be inserted
+    """
+    try:
+        data = orjson.loads(item)
+        return data, AnomalyAlert(
+            tracking_user_id=data['tracking_user_id'],
+            latitude=data['latitude'],
+            longitude=data['longitude'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            anomaly_score=data['anomaly_score'],
+        )
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        logger.error("Dropping malformed buffered anomaly alert %r: %s", item, e)
+        return None
+
+
+@shared_task
+def flush_anomaly_buffer():
+    """
+    Bulk-insert anomaly alerts buffered in Redis by TrackLocationView
+    Scheduled by Celery beat; drains the buffer in batches so a burst of
+    anomalies costs one INSERT per batch instead of one per alert
+    
+    Malformed records are logged and skipped. When an INSERT fails the batch
+    goes back to the buffer with its attempt count raised, and alerts that
+    have failed ANOMALY_FLUSH_MAX_ATTEMPTS times go to the dead-letter list
+    """
+    flushed = 0
+    
+    while True:
+        batch = redis_client.pop_pending_alerts(ANOMALY_FLUSH_BATCH_SIZE)
+        if not batch:
+            break
+        
+        parsed = [result for result in map(_parse_buffered_alert, batch) if result is not None]
+        if not parsed:
+            continue
+        alert_data = [data for data, _ in parsed]
+        alerts = [alert for _, alert in parsed]
+        
+        try:
+            AnomalyAlert.objects.bulk_create(alerts, batch_size=ANOMALY_FLUSH_BATCH_SIZE)
+        except Exception:
+            # Keep the alerts for the next run rather than dropping them, up
+            # to the attempt cap
+            retry, dead = [], []
+            for data in alert_data:
+                data['flush_attempts'] = data.get('flush_attempts', 0) + 1
+                target = dead if data['flush_attempts'] >= ANOMALY_FLUSH_MAX_ATTEMPTS else retry
+                target.append(orjson.dumps(data))
+            redis_client.requeue_pending_alerts(retry)
+            if dead:
+                logger.error("Moving %s anomaly alerts to the dead-letter list after repeated insert failures", len(dead))
+                redis_client.dead_letter_alerts(dead)
+            raise
+        
+        for tracking_user_id in {data['tracking_user_id'] for data in alert_data}:
+            redis_client.invalidate_safety_score(tracking_user_id)
+        flushed += len(alerts)
+    
+    return flushed
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Admin token -> (user, expiry) so reconnect storms don't hit the database
+# for every connection; only successful lookups are cached. The cache is
+# bounded and entries are dropped as soon as the token or its user changes
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAX_SIZE = 1024
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_cached_user(token):
+    """Return the cached user for a token, or None if missing or expired"""
+    now = time.monotonic()
+    with _lock:
+        cached = _entries.get(token)
+        if cached is None:
+            return None
+        if cached[1] <= now:
+            del _entries[token]
+            return None
+        _entries.move_to_end(token)
+        return cached[0]
+
+
+def cache_user(token, user):
+    """Cache a successful token lookup, evicting the least recently used entries"""
+    with _lock:
+        _entries[token] = (user, time.monotonic() + TOKEN_CACHE_TTL_SECONDS)
+        _entries.move_to_end(token)
+        while len(_entries) > TOKEN_CACHE_MAX_SIZE:
+            _entries.popitem(last=False)
+
+
+def invalidate_token(token):
+    """Forget a token, e.g. after it has been deleted"""
+    with _lock:
+        _entries.pop(token, None)
+
+
+def invalidate_user(user_id):
+    """Forget every cached token of a user, e.g. after their permissions change"""
+    with _lock:
+        for token in [token for token, (user, _) in _entries.items() if user.pk == user_id]:
+            del _entries[token]
@@ -1,7 +1,14 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
+from django.db.models import Count, Max, Q
 from django.utils import timezone
 from .models import AnomalyAlert
-import pytz
+from .redis_utils import redis_client
+
+# IST is a fixed UTC+05:30 offset with no DST, so the local hour can be taken
+# straight from UTC without building a timezone object on every call
+IST_OFFSET = timedelta(hours=5, minutes=30)
+NIGHT_START_HOUR = 22  # 10 PM IST
+NIGHT_END_HOUR = 5     # 5 AM IST
 
 def calculate_safety_score(user):
     """
@@ -22,11 +29,13 @@ def calculate_safety_score(user):
     anomaly_penalty = recent_anomalies * 15
     if anomaly_penalty > 0:
         factors.append(f"Detected {recent_anomalies} recent movement anomalies.")
+    if anomaly_penalty >= base_score:
+        # No other penalty can lower the score further
+        return {"score": 0, "factors": factors}
 
     # 2. Time of Day Penalty: -10 points between 10 PM and 5 AM IST
-    ist = pytz.timezone('Asia/Kolkata')
-    now_ist = datetime.now(ist)
-    if now_ist.hour >= 22 or now_ist.hour < 5:
+    now_hour = (timezone.now() + IST_OFFSET).hour
+    if now_hour >= NIGHT_START_HOUR or now_hour < NIGHT_END_HOUR:
         time_penalty = 10
         factors.append("Traveling during late night hours.")
     else:
@@ -48,41 +57,60 @@ def calculate_safety_score_by_user_id(user_id):
         
     Returns:
         dict: {"score": int, "factors": list}
+    
+    Results are cached in Redis for a short TTL and invalidated whenever the
+    user's anomalies change, so repeated polls skip the database.
     """
-    from django.contrib.auth.models import User
+    cached = redis_client.get_cached_safety_score(user_id)
+    if cached is not None:
+        return cached
     
+    score_data = _compute_safety_score_by_user_id(user_id)
+    redis_client.cache_safety_score(user_id, score_data)
+    return score_data
+
+
+def _compute_safety_score_by_user_id(user_id):
+    """Compute the safety score for calculate_safety_score_by_user_id without caching"""
     base_score = 100
     factors = []
     
-    try:
-        # Try to find user by username pattern used in TrackLocationView
-        user = User.objects.get(username=f'user_{user_id}')
-        
+    # One query off the (tracking_user_id, -timestamp) index: the recent
+    # alert count, plus whether the user has any alerts at all
+    one_day_ago = timezone.now() - timedelta(days=1)
+    alert_stats = AnomalyAlert.objects.filter(tracking_user_id=user_id).aggregate(
+        recent=Count('id', filter=Q(timestamp__gte=one_day_ago)),
+        latest_id=Max('id')
+    )
+    recent_anomalies = alert_stats['recent']
+    
+    if alert_stats['latest_id'] is not None:
         # 1. Anomaly Penalty: -15 points per anomaly in the last 24 hours
-        one_day_ago = timezone.now() - timedelta(days=1)
-        recent_anomalies = AnomalyAlert.objects.filter(user=user, timestamp__gte=one_day_ago).count()
         anomaly_penalty = recent_anomalies * 15
         if anomaly_penalty > 0:
             factors.append(f"Detected {recent_anomalies} recent movement anomalies")
-
-        # 2. Time of Day Penalty: -10 points between 10 PM and 5 AM IST
-        ist = pytz.timezone('Asia/Kolkata')
-        now_ist = datetime.now(ist)
-        if now_ist.hour >= 22 or now_ist.hour < 5:
-            time_penalty = 10
-            factors.append("Traveling during late night hours")
+        
+        if anomaly_penalty >= base_score:
+            # No other penalty can lower the score further
+            final_score = 0
         else:
-            time_penalty = 0
+            # 2. Time of Day Penalty: -10 points between 10 PM and 5 AM IST
+            now_hour = (timezone.now() + IST_OFFSET).hour
+            if now_hour >= NIGHT_START_HOUR or now_hour < NIGHT_END_HOUR:
+                time_penalty = 10
+                factors.append("Traveling during late night hours")
+            else:
+                time_penalty = 0
+                
+            # 3. Journey Status Bonus: +5 points if currently tracking
+            # This could be enhanced to check Redis for active journey
             
-        # 3. Journey Status Bonus: +5 points if currently tracking
-        # This could be enhanced to check Redis for active journey
+            # Calculate final score
+            final_score = base_score - anomaly_penalty - time_penalty
+            final_score = max(0, min(100, final_score))  # Clamp score between 0 and 100
         
-        # Calculate final score
-        final_score = base_score - anomaly_penalty - time_penalty
-        final_score = max(0, min(100, final_score))  # Clamp score between 0 and 100
-        
-    except User.DoesNotExist:
-        # User hasn't started tracking yet, return base score
+    else:
+        # No alerts recorded for this user, return base score
         final_score = base_score
         factors.append("No tracking history available")
 
@@ -1,12 +1,17 @@
+import logging
+import redis
 from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.db import transaction
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
+from adrf.views import APIView as AsyncAPIView
 from .utils import calculate_safety_score_by_user_id
 
 from .serializers import (
@@ -15,8 +20,26 @@ from .serializers import (
     UpdateAnomalySerializer
 )
 from .models import AnomalyAlert
+from .ml_models import anomaly_model
+from .feature_engineering import feature_engineer
 from .permissions import IsStaffOrSuperUser
-from .redis_utils import redis_client
+from .redis_utils import redis_client, async_redis_client
+from .tasks import send_anomaly_webhook
+
+logger = logging.getLogger(__name__)
+
+# Exactly what the user_id-only journey serializers return when user_id is
+# absent, so rejecting it before building one does not change the response.
+# TrackLocationView has no such check: its serializer reports every bad field
+_MISSING_USER_ID_ERRORS = {'user_id': ['This field is required.']}
+
+
+def _missing_user_id(data):
+    """
+    True when a dict body has no user_id key; null, blank and non-dict bodies
+    are left to the serializer so their error bodies stay the same
+    """
+    return isinstance(data, dict) and 'user_id' not in data
 
 
 class RegisterView(generics.CreateAPIView):
@@ -24,11 +47,13 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
     
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
+        # Created by the post_save handler in signals.py in this transaction
+        token = user.auth_token
         
         return Response({
             'user_id': user.id,
@@ -48,7 +73,12 @@ class GetAuthTokenView(APIView):
             
             user = authenticate(username=username, password=password)
             if user:
-                token, created = Token.objects.get_or_create(user=user)
+                # Issued by the post_save handler in signals.py; only users
+                # created before it was added can be missing one
+                try:
+                    token = user.auth_token
+                except Token.DoesNotExist:
+                    token, created = Token.objects.get_or_create(user=user)
                 return Response({
                     'user_id': user.id,
                     'username': user.username,
@@ -66,7 +96,10 @@ class StartJourneyView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
-        print(f"Received start_journey request: {request.data}")
+        logger.debug("Received start_journey request: %s", request.data)
+        if _missing_user_id(request.data):
+            return Response(_MISSING_USER_ID_ERRORS, status=status.HTTP_400_BAD_REQUEST)
+        
         serializer = StartJourneySerializer(data=request.data)
         if serializer.is_valid():
             user_id = serializer.validated_data['user_id']
@@ -98,7 +131,7 @@ class StartJourneyView(APIView):
                     'error': str(e)
                 })
         
-        print(f"StartJourney serializer errors: {serializer.errors}")
+        logger.debug("StartJourney serializer errors: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -106,6 +139,9 @@ class EndJourneyView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
+        if _missing_user_id(request.data):
+            return Response(_MISSING_USER_ID_ERRORS, status=status.HTTP_400_BAD_REQUEST)
+        
         serializer = EndJourneySerializer(data=request.data)
         if serializer.is_valid():
             user_id = serializer.validated_data['user_id']
@@ -124,15 +160,9 @@ class EndJourneyView(APIView):
                 success = redis_client.end_journey(user_id)
                 
                 # Reset safety score by clearing anomaly alerts for this user
-                try:
-                    # Get the User object using the same pattern as TrackLocationView
-                    from django.contrib.auth.models import User
-                    user = User.objects.get(username=f'user_{user_id}')
-                    deleted_count, _ = AnomalyAlert.objects.filter(user=user).delete()
-                    print(f"Journey ended for user {user_id}: Cleared {deleted_count} anomaly alerts (safety score reset to 100)")
-                except User.DoesNotExist:
-                    print(f"No user found for user_id {user_id}, no anomalies to clear")
-                    deleted_count = 0
+                deleted_count, _ = AnomalyAlert.objects.filter(tracking_user_id=user_id).delete()
+                redis_client.invalidate_safety_score(user_id)
+                logger.debug("Journey ended for user %s: Cleared %s anomaly alerts (safety score reset to 100)", user_id, deleted_count)
                 
                 if success:
                     return Response({
@@ -148,16 +178,11 @@ class EndJourneyView(APIView):
             except Exception as e:
                 # Even if Redis fails, still clear anomalies to reset safety score
                 try:
-                    # Get the User object using the same pattern as TrackLocationView
-                    from django.contrib.auth.models import User
-                    user = User.objects.get(username=f'user_{user_id}')
-                    deleted_count, _ = AnomalyAlert.objects.filter(user=user).delete()
-                    print(f"Journey ended for user {user_id}: Cleared {deleted_count} anomaly alerts (safety score reset to 100)")
-                except User.DoesNotExist:
-                    print(f"No user found for user_id {user_id}, no anomalies to clear")
-                    deleted_count = 0
+                    deleted_count, _ = AnomalyAlert.objects.filter(tracking_user_id=user_id).delete()
+                    redis_client.invalidate_safety_score(user_id)
+                    logger.debug("Journey ended for user %s: Cleared %s anomaly alerts (safety score reset to 100)", user_id, deleted_count)
                 except Exception as db_error:
-                    print(f"Failed to clear anomalies for user {user_id}: {db_error}")
+                    logger.warning("Failed to clear anomalies for user %s: %s", user_id, db_error)
                     deleted_count = 0
                 
                 return Response({
@@ -171,107 +196,104 @@ class EndJourneyView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TrackLocationView(APIView):
+class TrackLocationView(AsyncAPIView):
+    """
+    Async so Redis, database and broker I/O for one request overlaps with
+    other requests on the ASGI event loop instead of holding a worker thread
+    """
     permission_classes = [AllowAny]
     
-    def post(self, request):
-        print(f"Received track_location request: {request.data}")
+    async def post(self, request):
+        logger.debug("Received track_location request: %s", request.data)
         serializer = TrackLocationSerializer(data=request.data)
         if serializer.is_valid():
             user_id = serializer.validated_data['user_id']
             
             try:
-                # Check if user has active journey
-                if not redis_client.is_journey_active(user_id):
-                    return Response(
-                        {'error': 'No active journey found. Please start a journey first.'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
                 # Process location data directly (without channels for now)
-                from .ml_models import anomaly_model
-                from .feature_engineering import feature_engineer
-                
-                # Add location to Redis sliding window
                 location_data = {
-                    'latitude': str(serializer.validated_data['latitude']),
-                    'longitude': str(serializer.validated_data['longitude']),
-                    'timestamp': serializer.validated_data['timestamp'].isoformat() if hasattr(serializer.validated_data['timestamp'], 'isoformat') else str(serializer.validated_data['timestamp'])
+                    'latitude': serializer.validated_data['latitude'],
+                    'longitude': serializer.validated_data['longitude'],
+                    'timestamp': serializer.validated_data['timestamp']
                 }
                 
-                window = redis_client.add_location_point(user_id, location_data)
+                # Check for an active journey and add the location to the
+                # Redis sliding window in a single round-trip
+                active, window = await async_redis_client.track_point_atomic(user_id, location_data)
+                if not active:
+                    return Response(
+                        {'error': 'No active journey found. Please start a journey first.'}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 
                 # Process for anomalies if we have enough data
                 if len(window) >= 2:
-                    features = feature_engineer.extract_features(window)
+                    # Feature extraction and model inference are CPU-bound,
+                    # keep them off the event loop
+                    features = await sync_to_async(
+                        feature_engineer.extract_features, thread_sensitive=False
+                    )(window)
                     if features is not None:
-                        is_anomaly, anomaly_score = anomaly_model.predict_anomaly(features)
+                        is_anomaly, anomaly_score = await sync_to_async(
+                            anomaly_model.predict_anomaly, thread_sensitive=False
+                        )(features)
                         
                         if is_anomaly:
-                            # Create anomaly alert
-                            from .models import AnomalyAlert
-                            # Get or create user for testing purposes
-                            user, created = User.objects.get_or_create(
-                                username=f'user_{user_id}',
-                                defaults={'email': f'user_{user_id}@test.com'}
-                            )
+                            # Create anomaly alert, keyed by the tracking user_id
+                            response_data = {
+                                'message': 'Location data processed',
+                                'anomaly_detected': True,
+                                'anomaly_score': float(anomaly_score),
+                            }
                             
-                            alert = AnomalyAlert.objects.create(
-                                user=user,
-                                latitude=serializer.validated_data['latitude'],
-                                longitude=serializer.validated_data['longitude'],
-                                timestamp=serializer.validated_data['timestamp'],
-                                anomaly_score=float(anomaly_score)
-                            )
+                            if settings.ANOMALY_SYNC_WRITE:
+                                alert = await AnomalyAlert.objects.acreate(
+                                    tracking_user_id=user_id,
+                                    latitude=serializer.validated_data['latitude'],
+                                    longitude=serializer.validated_data['longitude'],
+                                    timestamp=serializer.validated_data['timestamp'],
+                                    anomaly_score=float(anomaly_score)
+                                )
+                                await async_redis_client.invalidate_safety_score(user_id)
+                                response_data['alert_id'] = alert.id
+                            else:
+                                # Buffer the alert; flush_anomaly_buffer bulk-inserts
+                                # it shortly and invalidates the safety score then
+                                await async_redis_client.buffer_anomaly_alert({
+                                    'tracking_user_id': user_id,
+                                    'latitude': serializer.validated_data['latitude'],
+                                    'longitude': serializer.validated_data['longitude'],
+                                    'timestamp': serializer.validated_data['timestamp'].isoformat(),
+                                    'anomaly_score': float(anomaly_score),
+                                })
                             
-                            # Send webhook to Express server
-                            import requests
-                            import os
+                            # Hand the webhook to a Celery worker so the response
+                            # does not wait on the Express server
+                            webhook_data = {
+                                'user_id': user_id,
+                                'anomaly_score': float(anomaly_score),
+                                'location': {
+                                    'lat': serializer.validated_data['latitude'],
+                                    'lng': serializer.validated_data['longitude']
+                                },
+                                'timestamp': serializer.validated_data['timestamp'].isoformat(),
+                                'alert_type': 'location_anomaly',
+                            }
                             
                             try:
-                                express_webhook_url = os.getenv('EXPRESS_WEBHOOK_URL', 'http://localhost:8080/api/v1/alerts/anomaly')
-                                webhook_data = {
-                                    'user_id': user_id,
-                                    'anomaly_score': float(anomaly_score),
-                                    'location': {
-                                        'lat': float(serializer.validated_data['latitude']),
-                                        'lng': float(serializer.validated_data['longitude'])
-                                    },
-                                    'timestamp': serializer.validated_data['timestamp'].isoformat(),
-                                    'alert_type': 'location_anomaly',
-                                }
-                                
-                                response = requests.post(
-                                    express_webhook_url,
-                                    json=webhook_data,
-                                    timeout=5
-                                )
-                                
-                                if response.status_code == 200:
-                                    print(f"Anomaly webhook sent successfully for user {user_id}")
-                                else:
-                                    print(f"Webhook failed with status {response.status_code}: {response.text}")
-                                    
+                                await sync_to_async(send_anomaly_webhook.delay, thread_sensitive=False)(webhook_data)
                             except Exception as e:
-                                print(f"Error sending anomaly webhook: {e}")
+                                logger.warning("Error queueing anomaly webhook: %s", e)
                             
-                            return Response(
-                                {
-                                    'message': 'Location data processed',
-                                    'anomaly_detected': True,
-                                    'anomaly_score': float(anomaly_score),
-                                    'alert_id': alert.id
-                                }, 
-                                status=status.HTTP_202_ACCEPTED
-                            )
+                            return Response(response_data, status=status.HTTP_202_ACCEPTED)
                 
                 return Response(
                     {'message': 'Location data processed - no anomaly detected'}, 
                     status=status.HTTP_202_ACCEPTED
                 )
                 
-            except Exception as e:
-                # Fallback response when Redis/Channels isn't available
+            except redis.exceptions.ConnectionError as e:
+                # Fallback response when Redis isn't available
                 return Response(
                     {
                         'message': 'Location data received (Redis not available - fallback mode)',
@@ -281,7 +303,7 @@ class TrackLocationView(APIView):
                     status=status.HTTP_202_ACCEPTED
                 )
         
-        print(f"TrackLocation serializer errors: {serializer.errors}")
+        logger.debug("TrackLocation serializer errors: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -290,11 +312,13 @@ class AdminAnomaliesView(generics.ListAPIView):
     permission_classes = [IsStaffOrSuperUser]
     
     def get_queryset(self):
-        return AnomalyAlert.objects.filter(is_resolved=False)
+        # The serializer renders each alert's user, so join it in up front
+        # instead of issuing one query per row
+        return AnomalyAlert.objects.filter(is_resolved=False).select_related('user').order_by('-timestamp')
 
 
 class UpdateAnomalyView(generics.UpdateAPIView):
-    queryset = AnomalyAlert.objects.all()
+    queryset = AnomalyAlert.objects.select_related('user')
     serializer_class = UpdateAnomalySerializer
     permission_classes = [IsStaffOrSuperUser]
     lookup_field = 'id'
@@ -316,10 +340,10 @@ class SafetyScoreView(APIView):
         
         try:
             score_data = calculate_safety_score_by_user_id(user_id)
-            print(f"Safety score calculated for user {user_id}: {score_data}")
+            logger.debug("Safety score calculated for user %s: %s", user_id, score_data)
             return Response(score_data, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Error calculating safety score for user {user_id}: {e}")
+            logger.warning("Error calculating safety score for user %s: %s", user_id, e)
             return Response(
                 {'error': 'Failed to calculate safety score', 'details': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -343,5 +367,6 @@ class ResetAnomaliesView(APIView):
         
         # For testing purposes, we'll use user_id as a string identifier
         # rather than requiring actual User objects
-        count, _ = AnomalyAlert.objects.filter(user_id=user_id).delete()
+        count, _ = AnomalyAlert.objects.filter(tracking_user_id=user_id).delete()
+        redis_client.invalidate_safety_score(user_id)
         return Response({"message": f"Successfully deleted {count} anomalies for user {user_id}."})
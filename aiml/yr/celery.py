@@ -0,0 +1,19 @@
+"""
+Celery config for yr project.
+
+Background tasks (e.g. outbound webhooks) are defined in each app's
+``tasks.py`` and picked up by ``autodiscover_tasks``. Start a worker with:
+
+    celery -A yr worker -Q webhooks,alerts
+    celery -A yr beat
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yr.settings')
+
+app = Celery('yr')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -31,6 +31,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver, needed for the async views
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -130,11 +131,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # Signed JWTs are verified locally instead of through the authtoken
+        # table; DRF tokens are still accepted for existing clients
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 50,
 }
 
 # Django Channels Configuration
@@ -172,3 +178,25 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
 REDIS_DB = 0
+
+# Celery Configuration (Redis broker, same server as redis_utils)
+CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ROUTES = {
+    'location_tracker.tasks.send_anomaly_webhook': {'queue': 'webhooks'},
+    'location_tracker.tasks.flush_anomaly_buffer': {'queue': 'alerts'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'flush-anomaly-buffer': {
+        'task': 'location_tracker.tasks.flush_anomaly_buffer',
+        'schedule': 1.0,
+    },
+}
+
+# Anomaly alerts are buffered in Redis and bulk-inserted by the
+# flush_anomaly_buffer beat task. With this False, alerts are only saved
+# while both `celery -A yr beat` and a worker consuming the alerts queue are
+# running; otherwise they pile up in Redis and safety scores never drop.
+# Set to True to write each alert synchronously in the request (e.g. in
+# development, tests, or deployments without Celery)
+ANOMALY_SYNC_WRITE = False
@@ -3,8 +3,10 @@
 Comprehensive test to identify where the safety score issue is occurring
 """
 
-import requests
+import httpx
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configuration
@@ -12,6 +14,14 @@ DJANGO_BASE_URL = "http://127.0.0.1:8000/api/v1"
 EXPRESS_BASE_URL = "http://localhost:8080/api/bridge/aiml"
 TEST_USER_ID = "test_anomaly_user"
 
+# Shared client so every request reuses pooled keep-alive connections, also
+# across the worker threads below
+SESSION = httpx.Client(timeout=10.0, limits=httpx.Limits(max_connections=20))
+
+# How often to poll the safety score while waiting for the
+# server to catch up (alerts are written asynchronously)
+POLL_INTERVAL = 0.1
+
 def log(message):
     """Print timestamped log"""
     timestamp = datetime.now().strftime("%H:%M:%S")
@@ -26,7 +36,7 @@ def test_full_flow():
     log("Step 1: Resetting anomalies to ensure clean state...")
     try:
         reset_url = f"{DJANGO_BASE_URL}/reset_anomalies/"
-        response = requests.post(reset_url, json={"user_id": TEST_USER_ID}, timeout=10)
+        response = SESSION.post(reset_url, json={"user_id": TEST_USER_ID})
         if response.status_code == 200:
             log(f"✅ Reset successful: {response.json().get('message')}")
         else:
@@ -34,9 +44,14 @@ def test_full_flow():
     except Exception as e:
         log(f"❌ Reset error: {e}")
     
+    # Steps 2 and 3 are independent reads, so fetch both at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        express_future = executor.submit(get_safety_score_via_express)
+        django_future = executor.submit(get_safety_score_django_direct)
+    
     # Step 2: Check safety score after reset
     log("Step 2: Checking safety score after reset...")
-    score, factors = get_safety_score_via_express()
+    score, factors = express_future.result()
     if score is not None:
         log(f"📊 Express Bridge Score: {score}")
         log(f"📋 Factors: {factors}")
@@ -50,7 +65,7 @@ def test_full_flow():
     
     # Step 3: Check Django direct
     log("Step 3: Checking Django safety score endpoint directly...")
-    django_score = get_safety_score_django_direct()
+    django_score = django_future.result()
     if django_score is not None:
         log(f"📊 Django Direct Score: {django_score.get('score')}")
         log(f"📋 Django Direct Factors: {django_score.get('factors')}")
@@ -77,6 +92,7 @@ def test_full_flow():
     # Step 7: Check score after normal location
     log("Step 7: Checking score after normal location...")
     score, factors = get_safety_score_via_express()
+    baseline_score = score
     if score is not None:
         log(f"📊 Score after normal location: {score}")
         log(f"📋 Factors: {factors}")
@@ -87,9 +103,10 @@ def test_full_flow():
     
     # Step 9: Check score after anomaly
     log("Step 9: Checking score after anomaly...")
-    import time
-    time.sleep(2)  # Wait for processing
-    score, factors = get_safety_score_via_express()
+    # Wait for processing: poll until the score drops below the baseline
+    score, factors = poll_safety_score(
+        lambda score: baseline_score is None or score < baseline_score, timeout=2
+    )
     if score is not None:
         log(f"📊 Score after anomaly: {score}")
         log(f"📋 Factors: {factors}")
@@ -109,8 +126,7 @@ def test_full_flow():
     
     # Step 11: Final score check
     log("Step 11: Final score check after journey end...")
-    time.sleep(1)  # Wait for processing
-    score, factors = get_safety_score_via_express()
+    score, factors = poll_safety_score(lambda score: score == 100, timeout=1)
     if score is not None:
         log(f"📊 Final Score: {score}")
         log(f"📋 Final Factors: {factors}")
@@ -122,12 +138,21 @@ def test_full_flow():
         else:
             log(f"⚠️  PARTIAL: Score is {score} instead of 100")
 
+def poll_safety_score(done, timeout):
+    """Poll the Express bridge score until done(score) is true or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while True:
+        score, factors = get_safety_score_via_express()
+        if (score is not None and done(score)) or time.monotonic() >= deadline:
+            return score, factors
+        time.sleep(POLL_INTERVAL)
+
 def get_safety_score_via_express():
     """Get safety score via Express bridge"""
     try:
         url = f"{EXPRESS_BASE_URL}/safetyScore"
         params = {"user_id": TEST_USER_ID}
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             return data.get("score"), data.get("factors", [])
@@ -143,7 +168,7 @@ def get_safety_score_django_direct():
     try:
         url = f"{DJANGO_BASE_URL}/safety_score/"
         params = {"user_id": TEST_USER_ID}
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params)
         if response.status_code == 200:
             return response.json()
         else:
@@ -158,7 +183,7 @@ def start_journey():
     try:
         url = f"{DJANGO_BASE_URL}/start_journey/"
         data = {"user_id": TEST_USER_ID}
-        response = requests.post(url, json=data, timeout=10)
+        response = SESSION.post(url, json=data)
         return response.status_code == 200
     except:
         return False
@@ -168,7 +193,7 @@ def end_journey():
     try:
         url = f"{DJANGO_BASE_URL}/end_journey/"
         data = {"user_id": TEST_USER_ID}
-        response = requests.post(url, json=data, timeout=10)
+        response = SESSION.post(url, json=data)
         if response.status_code == 200:
             response_data = response.json()
             if response_data.get('safety_score_reset'):
@@ -192,7 +217,7 @@ def send_location(lat, lng, description):
             "speed": 5,
             "heading": 90
         }
-        response = requests.post(url, json=data, timeout=10)
+        response = SESSION.post(url, json=data)
         if response.status_code == 202:
             response_data = response.json()
             if response_data.get("anomaly_detected"):
@@ -1,37 +1,132 @@
 # generate_normal_data.py
 
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from datetime import datetime
 
-def generate_trip(start_lat, start_lon, end_lat, end_lon, num_points, start_time, avg_speed_kmh, noise_level=0.0001):
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, the trip kernels then run in Python
+    prange = range
+    _NUMBA_AVAILABLE = False
+
+# One PCG64 generator for the whole script instead of the legacy global RNG
+_RNG = np.random.default_rng()
+
+
+def _trip_core(start_lat, start_lon, end_lat, end_lon, duration_seconds, noise_level, phi,
+               noise, jitter, lats, lons, secs):
     """
-    Generates a realistic GPS trajectory between two points with noise.
+    Fill lats, lons and secs (whole seconds from the trip start) for one trip
+    from pre-drawn standard normal noise rows and timestamp jitter.
+    The noise is run through an AR(1) recursion so consecutive points are
+    correlated while each axis keeps unit variance before scaling.
     """
-    # Create a straight line path between start and end points
-    lats = np.linspace(start_lat, end_lat, num_points)
-    lons = np.linspace(start_lon, end_lon, num_points)
+    num_points = lats.shape[0]
+    if num_points == 0:
+        return
+    step = 1.0 / (num_points - 1) if num_points > 1 else 0.0
+    innovation_scale = np.sqrt(1.0 - phi * phi)
+    lat_noise = noise[0, 0]
+    lon_noise = noise[0, 1]
+    for i in range(num_points):
+        if i:
+            lat_noise = phi * lat_noise + innovation_scale * noise[i, 0]
+            lon_noise = phi * lon_noise + innovation_scale * noise[i, 1]
+        frac = i * step
+        lats[i] = start_lat + (end_lat - start_lat) * frac + noise_level * lat_noise
+        lons[i] = start_lon + (end_lon - start_lon) * frac + noise_level * lon_noise
+        secs[i] = int(duration_seconds * frac + jitter[i])
 
-    # Add random noise to make the path look more natural
-    lats += np.random.normal(0, noise_level, num_points)
-    lons += np.random.normal(0, noise_level, num_points)
-    
+
+def _trips_core(params, offsets, noise, jitter, lats, lons, secs):
+    """
+    Run _trip_core for every trip in parallel. Row k of params holds
+    (start_lat, start_lon, end_lat, end_lon, duration_seconds, noise_level, phi)
+    and trip k owns rows offsets[k]:offsets[k + 1] of the other arrays.
+    """
+    for k in prange(params.shape[0]):
+        lo, hi = offsets[k], offsets[k + 1]
+        _trip_core(params[k, 0], params[k, 1], params[k, 2], params[k, 3],
+                   params[k, 4], params[k, 5], params[k, 6],
+                   noise[lo:hi], jitter[lo:hi], lats[lo:hi], lons[lo:hi], secs[lo:hi])
+
+
+if _NUMBA_AVAILABLE:
+    _trip_core = njit(cache=True)(_trip_core)
+    _trips_core = njit(cache=True, parallel=True)(_trips_core)
+
+
+def _trip_params(start_lat, start_lon, end_lat, end_lon, avg_speed_kmh, noise_level, noise_correlation):
+    """Kernel parameter row for one trip"""
     # Estimate total trip time based on a simple distance approximation and average speed
     total_dist_approx = np.sqrt((end_lat - start_lat)**2 + (end_lon - start_lon)**2) * 111 
     duration_hours = total_dist_approx / avg_speed_kmh
     duration_seconds = duration_hours * 3600
-    
-    # Create timestamps with slight variations
-    time_deltas = np.linspace(0, duration_seconds, num_points)
-    timestamps = [start_time + timedelta(seconds=int(td + np.random.uniform(-5, 5))) for td in time_deltas]
-    
-    df = pd.DataFrame({
-        'latitude': lats,
-        'longitude': lons,
+    return (start_lat, start_lon, end_lat, end_lon, duration_seconds, noise_level,
+            np.exp(-1.0 / noise_correlation))
+
+
+def _package_trip(lats, lons, secs, start_time):
+    """
+    Column dict for one trip in time order; datetime handling stays in
+    NumPy. The jitter can swap neighbouring points, so the trip is stably
+    sorted on its second offsets.
+    """
+    order = np.argsort(secs, kind='stable')
+    timestamps = np.datetime64(start_time, 's') + secs[order].astype('timedelta64[s]')
+    return {
+        'latitude': lats[order],
+        'longitude': lons[order],
         'timestamp': timestamps
-    })
+    }
+
+
+def generate_trip(start_lat, start_lon, end_lat, end_lon, num_points, start_time, avg_speed_kmh, noise_level=0.0001, noise_correlation=10.0):
+    """
+    Generates a realistic GPS trajectory between two points with noise.
+    GPS error drifts rather than jumping independently between fixes, so the
+    noise is correlated over roughly noise_correlation consecutive points.
+    Timestamps get up to 5 seconds of jitter and are truncated to whole seconds.
+    Returns a dict of equal-length numpy arrays keyed by column name.
+    """
+    params = _trip_params(start_lat, start_lon, end_lat, end_lon, avg_speed_kmh, noise_level, noise_correlation)
+    lats = np.empty(num_points)
+    lons = np.empty(num_points)
+    secs = np.empty(num_points, dtype=np.int64)
+    _trip_core(*params, _RNG.standard_normal((num_points, 2)), _RNG.uniform(-5, 5, num_points), lats, lons, secs)
+    return _package_trip(lats, lons, secs, start_time)
+
+
+def generate_trips(trips):
+    """
+    Batch version of generate_trip for generating many trips at once.
+    trips is a list of dicts of generate_trip keyword arguments; returns a
+    list of column dicts in the same order. All random draws happen up front
+    and the trips are then filled in parallel.
+    """
+    counts = np.array([trip['num_points'] for trip in trips], dtype=np.int64)
+    offsets = np.zeros(len(trips) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    params = np.array([
+        _trip_params(trip['start_lat'], trip['start_lon'], trip['end_lat'], trip['end_lon'],
+                     trip['avg_speed_kmh'], trip.get('noise_level', 0.0001),
+                     trip.get('noise_correlation', 10.0))
+        for trip in trips
+    ], dtype=np.float64).reshape(len(trips), 7)
+    
+    total = offsets[-1]
+    lats = np.empty(total)
+    lons = np.empty(total)
+    secs = np.empty(total, dtype=np.int64)
+    _trips_core(params, offsets, _RNG.standard_normal((total, 2)), _RNG.uniform(-5, 5, total), lats, lons, secs)
     
-    return df
+    return [
+        _package_trip(lats[lo:hi], lons[lo:hi], secs[lo:hi], trip['start_time'])
+        for trip, lo, hi in zip(trips, offsets[:-1], offsets[1:])
+    ]
 
 if __name__ == "__main__":
     print("🚀 Generating realistic 'normal' GPS data for training...")
@@ -51,7 +146,7 @@ if __name__ == "__main__":
 
     # --- Trip 2: A taxi ride from Bandra to Juhu ---
     print("    -> Simulating Trip 2: Taxi from Bandra to Juhu...")
-    trip2_start_time = trip1['timestamp'].iloc[-1] + timedelta(minutes=30)
+    trip2_start_time = trip1['timestamp'][-1] + np.timedelta64(30, 'm')
     trip2 = generate_trip(
         start_lat=19.0544, start_lon=72.8406,  # Bandra
         end_lat=19.1076, end_lon=72.8263,    # Juhu Beach
@@ -61,22 +156,38 @@ if __name__ == "__main__":
         noise_level=0.0008
     )
     
-    # Combine all trips into one DataFrame
-    full_trip_df = pd.concat([trip1, trip2], ignore_index=True).sort_values(by='timestamp')
-
-    # Add the other columns to match the required format
-    full_trip_df['is_valid_alt'] = 0
-    full_trip_df['altitude_in_feet'] = 492 # Placeholder
-    full_trip_df['data_field'] = 0 # Placeholder
-    full_trip_df['date'] = full_trip_df['timestamp'].dt.strftime('%Y-%m-%d')
-    full_trip_df['time'] = full_trip_df['timestamp'].dt.strftime('%H:%M:%S')
-    
-    # Final column order
-    final_df = full_trip_df[['latitude', 'longitude', 'is_valid_alt', 'altitude_in_feet', 'data_field', 'date', 'time']]
+    # Combine all trips column by column. Each trip is already in time order
+    # and trip 2 starts after trip 1 ends, so the combined data needs no sort
+    trips = [trip1, trip2]
+    lats = np.concatenate([trip['latitude'] for trip in trips])
+    lons = np.concatenate([trip['longitude'] for trip in trips])
+    timestamps = np.concatenate([trip['timestamp'] for trip in trips])
+    num_rows = len(timestamps)
+
+    # Split numpy's ISO 'YYYY-MM-DDTHH:MM:SS' strings rather than calling
+    # strftime once per row for each column
+    date_time = np.char.partition(timestamps.astype('datetime64[s]').astype(str), 'T')
+
+    # Build the output table straight from the arrays in the final column
+    # order, with the other columns matching the required format using the
+    # smallest integer types that hold the placeholder values
+    table = pa.table({
+        'latitude': lats,
+        'longitude': lons,
+        'is_valid_alt': np.zeros(num_rows, dtype=np.int8),
+        'altitude_in_feet': np.full(num_rows, 492, dtype=np.int16), # Placeholder
+        'data_field': np.zeros(num_rows, dtype=np.int8), # Placeholder
+        'date': date_time[:, 0],
+        'time': date_time[:, 2],
+    })
     
-    # Save to CSV
+    # Save to CSV with pyarrow's C++ writer; nothing in the data needs quoting
     output_filename = 'normal_gps_data.csv'
-    final_df.to_csv(output_filename, index=False)
+    pacsv.write_csv(
+        table,
+        output_filename,
+        write_options=pacsv.WriteOptions(quoting_style='none', quoting_header='none'),
+    )
     
-    print(f"\n✅ Successfully generated {len(final_df)} data points.")
+    print(f"\n✅ Successfully generated {num_rows} data points.")
     print(f"✅ Data saved to '{output_filename}'. You can now use this file to retrain your model.")
\ No newline at end of file
@@ -12,55 +12,75 @@ This script tests the full anomaly detection pipeline by:
 Usage: python test_anomaly_detection.py
 """
 
-import requests
+import asyncio
+import httpx
+import numpy as np
 import time
-import json
+import orjson
 from datetime import datetime, timedelta
-import random
 
 # Configuration
 DJANGO_BASE_URL = "http://127.0.0.1:8000/api/v1"
 EXPRESS_BASE_URL = "http://localhost:8080/api/bridge/aiml"  # Updated to correct port
 TEST_USER_ID = "test_anomaly_user"
 
+# Log every location sent; otherwise each phase logs one summary line and
+# only failures and detected anomalies are logged per point
+VERBOSE = False
+
 # Test location data
 MUMBAI_BASE = {"lat": 19.0760, "lng": 72.8777}  # Mumbai coordinates
 
+_RNG = np.random.default_rng()
+
+# Log timestamps only have second resolution, so the formatted string is
+# reused until the wall-clock second changes
+_last_log_second = None
+_last_log_timestamp = ""
+
 def get_timestamp():
     """Get formatted timestamp for logging"""
-    return datetime.now().strftime("%H:%M:%S")
+    global _last_log_second, _last_log_timestamp
+    now = int(time.time())
+    if now != _last_log_second:
+        _last_log_timestamp = time.strftime("%H:%M:%S", time.localtime(now))
+        _last_log_second = now
+    return _last_log_timestamp
 
 def reset_user_anomalies():
     """Reset all anomalies for the test user to ensure clean test state"""
     print("\n🔄 Resetting user anomalies in the database...")
     url = f"{DJANGO_BASE_URL}/reset_anomalies/"
     try:
-        response = requests.post(url, json={"user_id": TEST_USER_ID}, timeout=10)
+        response = httpx.post(url, json={"user_id": TEST_USER_ID}, timeout=10)
         if response.status_code == 200:
-            print(f"✅ {response.json().get('message')}")
+            print(f"✅ {orjson.loads(response.content).get('message')}")
         else:
             print(f"❌ Failed to reset anomalies: {response.status_code} - {response.text}")
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error connecting to reset endpoint: {e}")
 
 class AnomalyTester:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = httpx.Client(timeout=10.0)
         self.user_id = TEST_USER_ID
         
+        # Endpoints and the fixed request fields are built once per tester
+        self._score_url = f"{EXPRESS_BASE_URL}/safetyScore"
+        self._start_url = f"{DJANGO_BASE_URL}/start_journey/"
+        self._end_url = f"{DJANGO_BASE_URL}/end_journey/"
+        self._track_url = f"{DJANGO_BASE_URL}/track_location/"
+        self._user_payload = {"user_id": self.user_id}
+        
     def log(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {message}")
+        print(f"[{get_timestamp()}] {message}")
         
     def get_safety_score(self):
         """Get current safety score via Express bridge"""
         try:
-            url = f"{EXPRESS_BASE_URL}/safetyScore"
-            params = {"user_id": self.user_id}
-            
-            response = self.session.get(url, params=params)
+            response = self.session.get(self._score_url, params=self._user_payload)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 return data.get("score", 100), data.get("factors", [])
             else:
                 self.log(f"❌ Failed to get safety score: {response.status_code} - {response.text}")
@@ -72,10 +92,7 @@ class AnomalyTester:
     def start_journey(self):
         """Start tracking journey"""
         try:
-            url = f"{DJANGO_BASE_URL}/start_journey/"
-            data = {"user_id": self.user_id}
-            
-            response = self.session.post(url, json=data)
+            response = self.session.post(self._start_url, json=self._user_payload)
             if response.status_code == 200:
                 self.log("✅ Journey started successfully")
                 return True
@@ -89,10 +106,7 @@ class AnomalyTester:
     def end_journey(self):
         """End tracking journey"""
         try:
-            url = f"{DJANGO_BASE_URL}/end_journey/"
-            data = {"user_id": self.user_id}
-            
-            response = self.session.post(url, json=data)
+            response = self.session.post(self._end_url, json=self._user_payload)
             if response.status_code == 200:
                 self.log("✅ Journey ended successfully")
                 return True
@@ -103,60 +117,79 @@ class AnomalyTester:
             self.log(f"❌ Error ending journey: {e}")
             return False
     
-    def send_location(self, lat, lng, description=""):
+    async def send_location(self, client, lat, lng, accuracy, speed, heading, description=""):
         """Send location data to tracking endpoint"""
         try:
-            url = f"{DJANGO_BASE_URL}/track_location/"
             data = {
                 "user_id": self.user_id,
                 "latitude": lat,
                 "longitude": lng,
                 "timestamp": datetime.now().isoformat() + "Z",
-                "accuracy": random.uniform(5, 30),
-                "speed": random.uniform(0, 50),
-                "heading": random.uniform(0, 360)
+                "accuracy": accuracy,
+                "speed": speed,
+                "heading": heading
             }
             
-            response = self.session.post(url, json=data)
-            status_icon = "✅" if response.status_code == 202 else "❌"
-            
-            anomaly_detected = "anomaly_detected" in response.text and "true" in response.text.lower()
-            anomaly_icon = "🚨" if anomaly_detected else "🟢"
-            
-            self.log(f"{status_icon} {anomaly_icon} Location sent: ({lat:.6f}, {lng:.6f}) {description}")
+            response = await client.post(self._track_url, json=data)
+            status_code = response.status_code
             
-            if response.status_code == 202:
-                response_data = response.json()
-                if response_data.get("anomaly_detected"):
-                    self.log(f"   🔥 ANOMALY DETECTED! Score: {response_data.get('anomaly_score', 'N/A')}")
+            if status_code == 202:
+                # Accepted locations carry a JSON verdict; parse the raw body
+                # once and never decode it to text
+                response_data = orjson.loads(response.content)
+                anomaly_detected = response_data.get("anomaly_detected") is True
+                anomaly_icon = "🚨" if anomaly_detected else "🟢"
+                if VERBOSE:
+                    self.log(f"✅ {anomaly_icon} Location sent: ({lat:.6f}, {lng:.6f}) {description}")
+                if anomaly_detected:
+                    self.log(f"   🔥 ANOMALY DETECTED! Score: {response_data.get('anomaly_score', 'N/A')} {description}")
                 return True, anomaly_detected
             else:
-                self.log(f"   ❌ Failed: {response.status_code} - {response.text}")
+                self.log(f"❌ Location failed: ({lat:.6f}, {lng:.6f}) {description}")
+                self.log(f"   ❌ Failed: {status_code} - {response.text}")
                 return False, False
                 
         except Exception as e:
             self.log(f"❌ Error sending location: {e}")
             return False, False
     
+    async def send_locations(self, points, interval=1.0):
+        """
+        Send (lat, lng, description) points one interval apart. Each send runs
+        as its own task, so a slow response doesn't delay the next point, and
+        sends are scheduled against fixed deadlines so the rate doesn't drift
+        """
+        loop = asyncio.get_running_loop()
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            # Accuracy, speed and heading for every point in one draw
+            jitter = _RNG.uniform([5, 0, 0], [30, 50, 360], (len(points), 3)).tolist()
+            tasks = []
+            deadline = loop.time()
+            for i, ((lat, lng, description), (accuracy, speed, heading)) in enumerate(zip(points, jitter)):
+                if i:
+                    deadline += interval
+                    delay = deadline - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self.send_location(client, lat, lng, accuracy, speed, heading, description)))
+            return await asyncio.gather(*tasks)
+    
     def generate_normal_path(self, num_points=5):
         """Generate normal walking path around Mumbai"""
         self.log("\n📍 Phase 1: Sending NORMAL location data...")
         
-        lat, lng = MUMBAI_BASE["lat"], MUMBAI_BASE["lng"]
+        # Small, realistic movement (within ~100m): a random walk of ~50m
+        # steps from the Mumbai base, drawn in one go
+        steps = _RNG.uniform(-0.0005, 0.0005, (num_points, 2))
+        coords = np.array([MUMBAI_BASE["lat"], MUMBAI_BASE["lng"]]) + np.cumsum(steps, axis=0)
         
-        for i in range(num_points):
-            # Small, realistic movement (within ~100m)
-            lat += random.uniform(-0.0005, 0.0005)  # ~50m variation
-            lng += random.uniform(-0.0005, 0.0005)
-            
-            # Round to 6 decimal places to match Django serializer constraints
-            lat = round(lat, 6)
-            lng = round(lng, 6)
-            
-            success, anomaly = self.send_location(lat, lng, f"- Normal point {i+1}")
-            time.sleep(1)  # Small delay between points
-            
-        self.log("✅ Normal path completed")
+        # Round to 6 decimal places to match Django serializer constraints
+        coords = np.round(coords, 6).tolist()
+        
+        points = [(lat, lng, f"- Normal point {i+1}") for i, (lat, lng) in enumerate(coords)]
+        
+        results = asyncio.run(self.send_locations(points))
+        self.log_phase_summary("Normal path", results)
     
     def generate_anomalous_path(self, num_points=3):
         """Generate anomalous location data that should trigger detection"""
@@ -171,15 +204,18 @@ class AnomalyTester:
             {"lat": 19.2000, "lng": 72.9000, "desc": "- ANOMALY: Erratic movement pattern"},
         ]
         
-        for i, location in enumerate(anomalous_locations[:num_points]):
-            success, anomaly = self.send_location(
-                location["lat"], 
-                location["lng"], 
-                location["desc"]
-            )
-            time.sleep(1)
-            
-        self.log("✅ Anomalous path completed")
+        points = [
+            (location["lat"], location["lng"], location["desc"])
+            for location in anomalous_locations[:num_points]
+        ]
+        results = asyncio.run(self.send_locations(points))
+        self.log_phase_summary("Anomalous path", results)
+    
+    def log_phase_summary(self, phase_name, results):
+        """Log how many of a phase's (success, anomaly) send results went through"""
+        sent = sum(1 for success, _ in results if success)
+        anomalies = sum(1 for _, anomaly in results if anomaly)
+        self.log(f"✅ {phase_name} completed: {sent}/{len(results)} locations sent, {anomalies} anomalies detected")
     
     def check_score_with_details(self, phase_name):
         """Get and display safety score with details"""
@@ -272,7 +308,7 @@ def main():
     
     try:
         # Check Django
-        response = requests.get(f"{DJANGO_BASE_URL}/", timeout=5)
+        response = httpx.get(f"{DJANGO_BASE_URL}/", timeout=5)
         print("✅ Django AI service is running")
     except:
         print("❌ Django AI service not accessible. Make sure it's running on port 8000")
@@ -280,7 +316,7 @@ def main():
     
     try:
         # Check Express
-        response = requests.get("http://localhost:8080/", timeout=5)
+        response = httpx.get("http://localhost:8080/", timeout=5)
         print("✅ Express server is running")
     except:
         print("❌ Express server not accessible. Make sure it's running on port 8080")
@@ -3,13 +3,20 @@
 Simple test to verify the reset endpoint works correctly
 """
 
-import requests
-import json
+import orjson
+import httpx
 
 # Configuration
 DJANGO_BASE_URL = "http://127.0.0.1:8000/api/v1"
 TEST_USER_ID = "test_anomaly_user"
 
+# Shared client so every request reuses pooled keep-alive connections;
+# connection errors are retried briefly while a server is still starting up
+SESSION = httpx.Client(
+    timeout=10.0,
+    transport=httpx.HTTPTransport(retries=2, limits=httpx.Limits(max_connections=10)),
+)
+
 def test_reset_endpoint():
     """Test the reset anomalies endpoint"""
     print("🧪 Testing Reset Anomalies Endpoint")
@@ -20,9 +27,9 @@ def test_reset_endpoint():
     
     try:
         print(f"📡 Sending POST request to: {url}")
-        print(f"📦 Payload: {json.dumps(payload, indent=2)}")
+        print(f"📦 Payload: {orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode()}")
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = SESSION.post(url, json=payload)
         
         print(f"\n📋 Response:")
         print(f"   Status Code: {response.status_code}")
@@ -30,13 +37,13 @@ def test_reset_endpoint():
         
         if response.status_code == 200:
             print(f"   ✅ Success!")
-            response_data = response.json()
-            print(f"   📄 Response Body: {json.dumps(response_data, indent=2)}")
+            response_data = orjson.loads(response.content)
+            print(f"   📄 Response Body: {orjson.dumps(response_data, option=orjson.OPT_INDENT_2).decode()}")
         else:
             print(f"   ❌ Failed!")
             print(f"   📄 Response Text: {response.text}")
             
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error connecting to endpoint: {e}")
         print("   Make sure Django server is running on port 8000")
 
@@ -3,12 +3,15 @@
 Quick test to check what the Express bridge endpoint is returning
 """
 
-import requests
-import json
+import orjson
+import httpx
 
 EXPRESS_BASE_URL = "http://localhost:8080/api/bridge/aiml"
 TEST_USER_ID = "test_anomaly_user"
 
+# One client for both checks
+SESSION = httpx.Client(timeout=10.0)
+
 def test_express_safety_score():
     """Test the Express bridge safety score endpoint"""
     print("🧪 Testing Express Bridge Safety Score Endpoint")
@@ -20,18 +23,19 @@ def test_express_safety_score():
     print(f"📡 Request URL: {url}")
     print(f"📦 Parameters: {params}")
     
+    data = None
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params)
         
         print(f"\n📋 Response:")
         print(f"   Status Code: {response.status_code}")
         print(f"   Headers: {dict(response.headers)}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   ✅ Success!")
             print(f"   📄 Response Body:")
-            print(json.dumps(data, indent=4))
+            print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
             
             score = data.get("score")
             factors = data.get("factors", [])
@@ -48,11 +52,11 @@ def test_express_safety_score():
             print(f"   ❌ Failed!")
             print(f"   📄 Response Text: {response.text}")
             
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error connecting to endpoint: {e}")
         return None
     
-    return response.json() if response.status_code == 200 else None
+    return data
 
 def test_django_safety_score_direct():
     """Test the Django safety score endpoint directly"""
@@ -66,21 +70,21 @@ def test_django_safety_score_direct():
     print(f"📦 Parameters: {params}")
     
     try:
-        response = requests.get(django_url, params=params, timeout=10)
+        response = SESSION.get(django_url, params=params)
         
         print(f"\n📋 Response:")
         print(f"   Status Code: {response.status_code}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"   ✅ Success!")
             print(f"   📄 Response Body:")
-            print(json.dumps(data, indent=4))
+            print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
         else:
             print(f"   ❌ Failed!")
             print(f"   📄 Response Text: {response.text}")
             
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error connecting to Django: {e}")
         print("   Make sure Django server is running on port 8000")
 
@@ -3,8 +3,9 @@
 Test script to verify safety score reset functionality when ending journey
 """
 
-import requests
-import json
+import orjson
+import httpx
+import time
 from datetime import datetime
 
 # Configuration
@@ -12,9 +13,26 @@ DJANGO_BASE_URL = "http://127.0.0.1:8000/api/v1"
 EXPRESS_BASE_URL = "http://localhost:8080/api/bridge/aiml"
 TEST_USER_ID = "safety_reset_test_user"
 
+# Shared client so every request reuses pooled keep-alive connections;
+# connection errors are retried briefly while a server is still starting up
+SESSION = httpx.Client(
+    timeout=10.0,
+    transport=httpx.HTTPTransport(retries=2, limits=httpx.Limits(max_connections=10)),
+)
+
+# Log timestamps only have second resolution, so the formatted string is
+# reused until the wall-clock second changes
+_last_log_second = None
+_last_log_timestamp = ""
+
 def get_timestamp():
     """Get formatted timestamp for logging"""
-    return datetime.now().strftime("%H:%M:%S")
+    global _last_log_second, _last_log_timestamp
+    now = int(time.time())
+    if now != _last_log_second:
+        _last_log_timestamp = time.strftime("%H:%M:%S", time.localtime(now))
+        _last_log_second = now
+    return _last_log_timestamp
 
 def log(message):
     """Print timestamped log message"""
@@ -26,9 +44,9 @@ def get_safety_score():
         url = f"{EXPRESS_BASE_URL}/safetyScore"
         params = {"user_id": TEST_USER_ID}
         
-        response = requests.get(url, params=params)
+        response = SESSION.get(url, params=params)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             return data.get("score", 100), data.get("factors", [])
         else:
             log(f"❌ Failed to get safety score: {response.status_code} - {response.text}")
@@ -43,7 +61,7 @@ def start_journey():
         url = f"{DJANGO_BASE_URL}/start_journey/"
         data = {"user_id": TEST_USER_ID}
         
-        response = requests.post(url, json=data)
+        response = SESSION.post(url, json=data)
         if response.status_code == 200:
             log("✅ Journey started successfully")
             return True
@@ -60,9 +78,9 @@ def end_journey():
         url = f"{DJANGO_BASE_URL}/end_journey/"
         data = {"user_id": TEST_USER_ID}
         
-        response = requests.post(url, json=data)
+        response = SESSION.post(url, json=data)
         if response.status_code == 200:
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             log("✅ Journey ended successfully")
             if response_data.get('safety_score_reset'):
                 anomalies_cleared = response_data.get('anomalies_cleared', 0)
@@ -90,9 +108,9 @@ def send_anomalous_location():
             "heading": 90
         }
         
-        response = requests.post(url, json=data)
+        response = SESSION.post(url, json=data)
         if response.status_code == 202:
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             if response_data.get("anomaly_detected"):
                 log(f"🚨 Anomalous location sent - Anomaly detected!")
             else:
@@ -128,7 +146,6 @@ def test_safety_score_reset():
     
     # Step 4: Check safety score after anomaly
     log("Step 4: Checking safety score after anomaly...")
-    import time
     time.sleep(2)  # Wait for processing
     score, factors = get_safety_score()
     if score is not None: